@@ -1,40 +1,89 @@
 import os
+import sys
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from utils import daemon
+
+if __name__ == "__main__":
+    # Client tipis: jika daemon berjalan, perintah diteruskan sebelum typer, rich, dan
+    # driver database di-import
+    code = daemon.forward(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+
+import io
 import typer
 import json
 import csv
+import functools
+import itertools
 from rich.console import Console
 from rich.table import Table
 from tabulate import tabulate
-from db.mysql import MySQLDB
-from db.postgresql import PostgreSQLDB
-from db.mongodb import MongoDB
-from db.cassandra import CassandraDB
 from db.transfer import interactive_transfer
-from dotenv import load_dotenv
 from utils.validation import is_valid_schema_name
+from utils.bulkload import deferred_indexes
+from utils import ndjson
+from utils.export import export_columns, export_types, write_export, EXPORT_FORMATS
+from db.fanout import FANOUT_BUFFER, db_target, fanout_transfer, file_target
+from utils.snapshot import open_fresh_snapshot, refresh_snapshot, snapshot_path
+from utils.csv_import import iter_csv_batches, IMPORT_WORKERS
+from utils.governor import build_governor, governed
+from utils.filters import column_definitions, parse_filter, project_structure
+from utils.batching import AdaptiveBatchSizer, write_batches, DEFAULT_BATCH_SIZE, MIN_BATCH_SIZE, MAX_BATCH_SIZE
 
 
 
-load_dotenv()
-
 app = typer.Typer(help="🧪 CLI untuk manajemen database")
 
 DEFAULT_SCHEMA_NAME = os.getenv("DEFAULT_SCHEMA_NAME", "warehouse_db")
 
 
 
-def get_db_handler(db: str):
+# Diisi oleh daemon:start agar handler (dan koneksinya) dipakai ulang antar perintah
+HANDLER_POOL = None
+
+def create_db_handler(db: str):
+    # Driver di-import saat dibutuhkan saja, cassandra-driver cukup berat
     if db == "mysql":
+        from db.mysql import MySQLDB
         return MySQLDB()
     elif db == "postgres":
+        from db.postgresql import PostgreSQLDB
         return PostgreSQLDB()
     elif db == "mongo":
+        from db.mongodb import MongoDB
         return MongoDB()
     elif db == "cassandra":
+        from db.cassandra import CassandraDB
         return CassandraDB()
     else:
         raise typer.BadParameter("Unsupported DB type. Use mysql/postgres/mongo/cassandra.")
 
+def get_db_handler(db: str):
+    if HANDLER_POOL is not None:
+        return HANDLER_POOL.get(db)
+    return create_db_handler(db)
+
+def build_row_filter(db_handler, schema: str, table: str, where: str, select_columns: str,
+                     allow_filtering: bool = False, search: tuple = None):
+    # Filter divalidasi terhadap struktur tabel sebelum dikirim ke server
+    if not where and not select_columns:
+        return None
+    try:
+        return parse_filter(where, select_columns, db_handler.describe_table(schema, table), allow_filtering,
+                            search)
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+def row_values(row, column_names: list[str]) -> list[str]:
+    # MongoDB mengembalikan dokumen (dict): ambil nilainya sesuai urutan kolom, bukan key-nya
+    if isinstance(row, dict):
+        row = [row.get(col) for col in column_names]
+    return [str(value) for value in row]
+
 @app.command("schema:create")
 def create_schema(
     db: str = typer.Option(...),
@@ -228,19 +277,38 @@ def read_data(
     db: str = typer.Option(..., help="Jenis database"),
     schema: str = typer.Option(DEFAULT_SCHEMA_NAME, help="Nama schema"),
     table: str = typer.Option(..., help="Nama tabel"),
+    use_snapshot: bool = typer.Option(True, "--snapshot/--no-snapshot", help="Pakai snapshot lokal jika ada (lihat table:snapshot)"),
+    where: str = typer.Option(None, help="Filter baris, contoh: \"umur >= 18 AND kota = 'Bandung'\" (MongoDB: boleh JSON)"),
+    select_columns: str = typer.Option(None, "--columns", help="Kolom yang diambil, pisahkan dengan koma"),
+    allow_filtering: bool = typer.Option(False, "--allow-filtering", help="(Cassandra) Izinkan filter di luar partition key"),
 ):
     db_handler = get_db_handler(db)
     console = Console()
+    row_filter = build_row_filter(db_handler, schema, table, where, select_columns, allow_filtering)
+
+    snapshot = open_fresh_snapshot(db_handler, db, schema, table) if use_snapshot else None
+    if snapshot and row_filter and row_filter.raw is not None:
+        snapshot.close()  # filter JSON MongoDB tidak bisa dijalankan di SQLite
+        snapshot = None
+    if snapshot:
+        # Dilayani dari salinan lokal, tanpa scan tabel remote
+        rows = snapshot.read_rows(row_filter)
+        column_names = snapshot.columns
+        snapshot.close()
+    else:
+        # Ambil data dari tabel, filter & kolom dikerjakan di server
+        rows = db_handler.read_data(schema, table, row_filter)
 
-    # Ambil data dari tabel
-    rows = db_handler.read_data(schema, table)
     if not rows:
         print(f"📭 Tidak ada data di tabel '{table}'")
         raise typer.Exit()
 
-    # Ambil nama kolom dari struktur tabel
-    columns = db_handler.describe_table(schema, table)
-    column_names = [col['Column'] for col in columns]
+    if row_filter and row_filter.columns:
+        column_names = row_filter.columns
+    elif not snapshot:
+        # Ambil nama kolom dari struktur tabel
+        columns = db_handler.describe_table(schema, table)
+        column_names = [col['Column'] for col in columns]
 
     # Membuat tabel menggunakan rich
     table = Table(show_header=True, header_style="bold magenta")
@@ -251,7 +319,7 @@ def read_data(
 
     # Menambahkan baris data
     for row in rows:
-        table.add_row(*map(str, row))
+        table.add_row(*row_values(row, column_names))
 
     # Tampilkan tabel
     console.print(table)
@@ -283,7 +351,7 @@ def update_data(
 
     # Menambahkan baris data
     for row in rows:
-        table_data.add_row(*map(str, row))
+        table_data.add_row(*row_values(row, column_names))
 
     # Tampilkan data untuk memilih baris
     console.print(table_data)
@@ -321,7 +389,7 @@ def delete_data(
         rich_table.add_column(column)
 
     for row in rows:
-        rich_table.add_row(*map(str, row))
+        rich_table.add_row(*row_values(row, column_names))
 
     console.print(rich_table)
 
@@ -342,88 +410,202 @@ def search_data(
     schema: str = typer.Option(DEFAULT_SCHEMA_NAME, help="Nama schema"),
     table: str = typer.Option(..., help="Nama tabel"),
     column: str = typer.Option(..., help="Kolom yang ingin dicari"),
-    keyword: str = typer.Option(..., help="Kata kunci pencarian")
+    keyword: str = typer.Option(..., help="Kata kunci pencarian"),
+    use_snapshot: bool = typer.Option(True, "--snapshot/--no-snapshot", help="Pakai snapshot lokal jika ada (lihat table:snapshot)"),
+    where: str = typer.Option(None, help="Filter baris, contoh: \"umur >= 18 AND kota = 'Bandung'\" (MongoDB: boleh JSON)"),
+    select_columns: str = typer.Option(None, "--columns", help="Kolom yang diambil, pisahkan dengan koma"),
+    allow_filtering: bool = typer.Option(False, "--allow-filtering", help="(Cassandra) Izinkan filter di luar partition key"),
 ):
     db_handler = get_db_handler(db)
     console = Console()
+    # Pencarian menjadi satu kondisi LIKE tambahan (kolomnya ikut divalidasi), dikerjakan di server
+    row_filter = build_row_filter(db_handler, schema, table, where, select_columns, allow_filtering,
+                                  search=(column, keyword))
+
+    snapshot = open_fresh_snapshot(db_handler, db, schema, table) if use_snapshot else None
+    if snapshot and row_filter and row_filter.raw is not None:
+        snapshot.close()
+        snapshot = None
+    if snapshot:
+        results = snapshot.read_rows(row_filter) if row_filter else snapshot.search(column, keyword)
+        column_names = snapshot.columns
+        snapshot.close()
+    elif row_filter:
+        results = db_handler.read_data(schema, table, row_filter)
+    else:
+        results = db_handler.search_data(schema, table, column, keyword)
 
-    results = db_handler.search_data(schema, table, column, keyword)
     if not results:
         print("📭 Tidak ada hasil ditemukan.")
         raise typer.Exit()
 
-    # Ambil struktur kolom
-    columns = db_handler.describe_table(schema, table)
-    column_names = [col['Column'] for col in columns]
+    if row_filter and row_filter.columns:
+        column_names = row_filter.columns
+    elif not snapshot:
+        # Ambil struktur kolom
+        columns = db_handler.describe_table(schema, table)
+        column_names = [col['Column'] for col in columns]
 
     table_display = Table(show_header=True, header_style="bold cyan")
     for col in column_names:
         table_display.add_column(col)
 
     for row in results:
-        table_display.add_row(*map(str, row))
+        table_display.add_row(*row_values(row, column_names))
 
     console.print(table_display)
 
+@app.command("table:snapshot")
+def snapshot_table(
+    db: str = typer.Option(..., help="Jenis database"),
+    schema: str = typer.Option(DEFAULT_SCHEMA_NAME, help="Nama schema"),
+    table: str = typer.Option(..., help="Nama tabel"),
+    watermark: str = typer.Option(None, help="Kolom yang selalu naik (mis. updated_at) untuk refresh inkremental"),
+    full: bool = typer.Option(False, "--full", help="Paksa salin ulang seluruh tabel"),
+):
+    """Simpan salinan lokal tabel untuk table:read-data dan table:search"""
+    db_handler = get_db_handler(db)
+    try:
+        count, mode = refresh_snapshot(db_handler, db, schema, table, watermark=watermark, full=full)
+        print(f"📸 Snapshot {mode} tabel '{table}' selesai: {count} baris disimpan di {snapshot_path(db, schema, table)}")
+    except Exception as e:
+        print("❌ Gagal membuat snapshot:", e)
+
 @app.command("table:export")
 def export_data(
     db: str = typer.Option(..., help="Jenis database"),
     schema: str = typer.Option(DEFAULT_SCHEMA_NAME, help="Nama schema"),
     table: str = typer.Option(..., help="Nama tabel"),
-    output: str = typer.Option(None, help="Nama file output CSV (opsional)")
+    output: str = typer.Option(None, help="Nama file output (opsional, '-' untuk stdout)"),
+    dest: str = typer.Argument(None, help="Sama dengan --output, contoh: '-' untuk stdout"),
+    format: str = typer.Option("csv", "--format", help="Format output: csv/ndjson/parquet"),
+    batch_size: int = typer.Option(DEFAULT_BATCH_SIZE, help="Jumlah baris per batch yang dibaca dan ditulis"),
+    max_rows_per_sec: float = typer.Option(None, help="Batas baris per detik (governor)"),
+    max_bytes_per_sec: float = typer.Option(None, help="Batas byte per detik (governor)"),
+    max_latency: float = typer.Option(None, help="Latensi per batch (detik) di atas ini membuat laju turun"),
+    protect: bool = typer.Option(False, "--protect", help="Mundur otomatis saat server sibuk (lag replika, Threads_running, timeout)"),
+    governor_file: str = typer.Option(None, help="File JSON untuk mengubah batas saat berjalan (jika ada batas lain: default GOVERNOR_CONTROL_FILE)"),
+    where: str = typer.Option(None, help="Filter baris, contoh: \"umur >= 18 AND kota = 'Bandung'\" (MongoDB: boleh JSON)"),
+    select_columns: str = typer.Option(None, "--columns", help="Kolom yang diambil, pisahkan dengan koma"),
+    allow_filtering: bool = typer.Option(False, "--allow-filtering", help="(Cassandra) Izinkan filter di luar partition key"),
 ):
-    db_handler = get_db_handler(db)
+    output = dest or output
+    if format not in EXPORT_FORMATS:
+        raise typer.BadParameter("Format tidak didukung. Gunakan csv/ndjson/parquet.")
 
-    rows = db_handler.read_data(schema, table)
-    if not rows:
-        print("📭 Tidak ada data di tabel ini.")
-        raise typer.Exit()
+    # Saat data dikirim ke stdout, pesan status harus ke stderr
+    to_stdout = output == "-"
+    log = functools.partial(print, file=sys.stderr) if to_stdout else print
 
-    columns = db_handler.describe_table(schema, table)
-    column_names = [col['Column'] for col in columns]
+    db_handler = get_db_handler(db)
+    row_filter = build_row_filter(db_handler, schema, table, where, select_columns, allow_filtering)
+    structure = db_handler.describe_table(schema, table)
+    columns, types = export_columns(structure, row_filter), export_types(structure)
+    governor = build_governor("source", db_handler, max_rows_per_sec, max_bytes_per_sec, max_latency,
+                              protect, governor_file)
+    batches = governed(db_handler.iter_batches(schema, table, batch_size, row_filter=row_filter), governor)
+    try:
+        first = next(batches, None)
+    except Exception as e:
+        log("❌ Error saat ekspor:", e)
+        raise typer.Exit()
+    if not first:
+        log("📭 Tidak ada data di tabel ini.")
+        raise typer.Exit()
+    batches = itertools.chain([first], batches)
 
-    filename = output or f"export_{table}.csv"
+    filename = output or f"export_{table}.{format}"
 
     try:
-        with open(filename, mode="w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            writer.writerow(column_names)
-            for row in rows:
-                writer.writerow(row)
-        print(f"📦 Data dari tabel '{table}' berhasil diekspor ke file '{filename}'.")
+        if to_stdout:
+            count = write_export(sys.stdout.buffer, batches, format, columns, types)
+        else:
+            with open(filename, mode="wb") as f:
+                count = write_export(f, batches, format, columns, types)
+        log(f"📦 {count} baris dari tabel '{table}' berhasil diekspor ke {'stdout' if to_stdout else f'file {filename!r}'}.")
     except Exception as e:
-        print("❌ Error saat ekspor:", e)
+        log("❌ Error saat ekspor:", e)
 
 @app.command("table:import")
 def import_data(
     db: str = typer.Option(..., help="Jenis database"),
     schema: str = typer.Option(DEFAULT_SCHEMA_NAME, help="Nama schema"),
     table: str = typer.Option(..., help="Nama tabel"),
-    file: str = typer.Option(..., help="Path ke file CSV yang ingin diimport")
+    file: str = typer.Option(None, help="Path ke file CSV/NDJSON yang ingin diimport ('-' untuk stdin)"),
+    source: str = typer.Argument(None, help="Sama dengan --file, contoh: '-' untuk stdin"),
+    format: str = typer.Option(None, "--format", help="csv/ndjson (default: dari ekstensi file, stdin = ndjson)"),
+    batch_size: int = typer.Option(DEFAULT_BATCH_SIZE, help="Ukuran batch awal (disesuaikan otomatis)"),
+    min_batch: int = typer.Option(MIN_BATCH_SIZE, help="Ukuran batch minimum"),
+    max_batch: int = typer.Option(MAX_BATCH_SIZE, help="Ukuran batch maksimum"),
+    upsert: bool = typer.Option(False, "--upsert", help="Timpa baris yang key-nya sudah ada (aman diulang)"),
+    key: str = typer.Option(None, help="Kolom key untuk upsert, pisahkan dengan koma (default: PRIMARY KEY; MySQL selalu memakai PRIMARY KEY/UNIQUE tabel)"),
+    defer_indexes: bool = typer.Option(False, "--defer-indexes", help="Lepas index sekunder & constraint selama import, bangun ulang sesudahnya"),
+    unlogged: bool = typer.Option(False, "--unlogged", help="(Postgres) Load tanpa WAL lalu SET LOGGED di akhir"),
+    workers: int = typer.Option(IMPORT_WORKERS, help="Jumlah proses untuk parsing CSV"),
+    max_rows_per_sec: float = typer.Option(None, help="Batas baris per detik (governor)"),
+    max_bytes_per_sec: float = typer.Option(None, help="Batas byte per detik (governor)"),
+    max_latency: float = typer.Option(None, help="Latensi per batch (detik) di atas ini membuat laju turun"),
+    protect: bool = typer.Option(False, "--protect", help="Mundur otomatis saat server sibuk (lag replika, Threads_running, timeout)"),
+    governor_file: str = typer.Option(None, help="File JSON untuk mengubah batas saat berjalan (jika ada batas lain: default GOVERNOR_CONTROL_FILE)"),
 ):
-    db_handler = get_db_handler(db)
-
-    if not os.path.exists(file):
+    file = source or file
+    if not file:
+        print("❌ Harus menyertakan --file atau '-' untuk stdin")
+        raise typer.Exit(code=1)
+    if format is None:
+        format = "ndjson" if file == "-" or file.endswith((".ndjson", ".jsonl")) else "csv"
+    if format not in ("csv", "ndjson"):
+        raise typer.BadParameter("Format tidak didukung. Gunakan csv/ndjson.")
+    if unlogged and not defer_indexes:
+        raise typer.BadParameter("--unlogged hanya berlaku bersama --defer-indexes.")
+
+    if file != "-" and not os.path.exists(file):
         print("❌ File tidak ditemukan:", file)
         raise typer.Exit()
 
+    key_columns = [k.strip() for k in key.split(",")] if key else None
+    if upsert and not key_columns and db == "mongo" and format == "csv":
+        # Baris CSV tidak punya _id, tanpa --key setiap baris akan menjadi dokumen baru
+        raise typer.BadParameter("Upsert CSV ke MongoDB butuh --key.")
+    db_handler = get_db_handler(db)
+    sizer = AdaptiveBatchSizer(batch_size, min_batch, max_batch, max_bytes=db_handler.max_batch_bytes)
+    governor = build_governor("target", db_handler, max_rows_per_sec, max_bytes_per_sec, max_latency,
+                              protect, governor_file)
+
     try:
-        with open(file, mode="r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            data = list(reader)
+        f = None
+        if file == "-":
+            f = sys.stdin.buffer
+        elif format == "ndjson":
+            f = open(file, mode="rb")
 
-        if not data:
-            print("📭 File CSV kosong.")
+        try:
+            if format == "ndjson":
+                rows = ndjson.read_rows(f)
+            elif f is not None:
+                reader = csv.DictReader(io.TextIOWrapper(f, encoding="utf-8", newline=""))
+                rows = ({k: (v if v != "" else None) for k, v in row.items()} for row in reader)
+            else:
+                # File CSV di disk: mmap + parsing paralel, nilai dikonversi sesuai tipe kolom
+                structure = db_handler.describe_table(schema, table)
+                column_types = {col.get("Column") or col.get("Field"): col.get("Type") for col in structure}
+                rows = iter_csv_batches(file, column_types, workers=workers)
+            with deferred_indexes(db_handler, schema, table, enabled=defer_indexes, unlogged=unlogged):
+                success_count, total = write_batches(
+                    db_handler, schema, table, rows, sizer, upsert=upsert, key_columns=key_columns,
+                    governor=governor,
+                )
+        finally:
+            if f is not None and f is not sys.stdin.buffer:
+                f.close()
+
+        if not total:
+            print("📭 File kosong.")
             raise typer.Exit()
 
-        success_count = 0
-        for row in data:
-            cleaned_row = {k: (v if v != "" else None) for k, v in row.items()}
-            result = db_handler.insert_data(schema, table, cleaned_row)
-            if result:
-                success_count += 1
-
-        print(f"✅ Berhasil mengimpor {success_count} dari {len(data)} baris ke tabel '{table}'.")
+        print(f"✅ Berhasil mengimpor {success_count} dari {total} baris ke tabel '{table}'.")
+    except typer.Exit:
+        raise
     except Exception as e:
         print("❌ Gagal mengimpor data:", e)
 
@@ -432,5 +614,174 @@ def transfer_data():
     """Transfer data dari satu DB ke DB lain"""
     interactive_transfer()
 
+@app.command("transfer:bench")
+def transfer_bench(
+    db: str = typer.Option(..., help="Jenis database (mysql/postgres/mongo)"),
+    schema: str = typer.Option(DEFAULT_SCHEMA_NAME, help="Nama schema"),
+    table: str = typer.Option(..., help="Tabel yang disalin ke tabel sementara"),
+):
+    """Bandingkan jalur cepat same-engine dengan jalur transfer umum"""
+    from db.fastpath import benchmark
+
+    results = benchmark(db, get_db_handler(db), schema, table)
+    bench = Table(title=f"Benchmark transfer {db}:{schema}.{table}")
+    bench.add_column("Jalur", style="cyan")
+    bench.add_column("Baris", justify="right")
+    bench.add_column("Detik", justify="right")
+    bench.add_column("Baris/detik", justify="right", style="green")
+    for label, count, seconds in results:
+        bench.add_row(label, str(count), f"{seconds:.2f}", f"{count / max(seconds, 1e-9):,.0f}")
+    Console().print(bench)
+
+@app.command("transfer:fanout")
+def transfer_fanout(
+    db: str = typer.Option(..., help="Database source"),
+    schema: str = typer.Option(DEFAULT_SCHEMA_NAME, help="Schema source"),
+    table: str = typer.Option(..., help="Tabel/collection source"),
+    to: list[str] = typer.Option(..., "--to", help="Target, bisa diulang: postgres:schema.tabel, mongo:tabel, csv:file.csv, ndjson:file, parquet:file"),
+    buffer: int = typer.Option(FANOUT_BUFFER, help="Maksimum batch yang menunggu per target sebelum source ditahan"),
+    batch_size: int = typer.Option(DEFAULT_BATCH_SIZE, help="Jumlah baris per batch yang dibaca dari source"),
+    upsert: bool = typer.Option(False, "--upsert", help="Target database memakai upsert"),
+    key: str = typer.Option(None, help="Kolom key untuk upsert, pisahkan dengan koma (default: PRIMARY KEY; MySQL selalu memakai PRIMARY KEY/UNIQUE tabel)"),
+    where: str = typer.Option(None, help="Filter baris, contoh: \"umur >= 18 AND kota = 'Bandung'\" (MongoDB: boleh JSON)"),
+    select_columns: str = typer.Option(None, "--columns", help="Kolom yang diambil, pisahkan dengan koma"),
+    allow_filtering: bool = typer.Option(False, "--allow-filtering", help="(Cassandra) Izinkan filter di luar partition key"),
+    max_rows_per_sec: float = typer.Option(None, help="Batas baris per detik (governor)"),
+    max_bytes_per_sec: float = typer.Option(None, help="Batas byte per detik (governor)"),
+    max_latency: float = typer.Option(None, help="Latensi per batch (detik) di atas ini membuat laju turun"),
+    protect: bool = typer.Option(False, "--protect", help="Mundur otomatis saat server sibuk (lag replika, Threads_running, timeout)"),
+    governor_file: str = typer.Option(None, help="File JSON untuk mengubah batas saat berjalan (jika ada batas lain: default GOVERNOR_CONTROL_FILE)"),
+):
+    """Baca tabel source sekali, tulis ke beberapa target sekaligus"""
+    key_columns = [k.strip() for k in key.split(",")] if key else None
+    source_handler = get_db_handler(db)
+    mongo_key_columns = key_columns
+    if upsert and not key_columns and any(spec.startswith("mongo:") for spec in to):
+        # Target MongoDB mencocokkan lewat PRIMARY KEY source, bukan _id yang tidak ada di baris SQL
+        mongo_key_columns = source_handler.primary_key(schema, table) or None
+        if not mongo_key_columns:
+            raise typer.BadParameter("Source tidak punya PRIMARY KEY, gunakan --key untuk upsert ke MongoDB.")
+    row_filter = build_row_filter(source_handler, schema, table, where, select_columns, allow_filtering)
+    structure = source_handler.describe_table(schema, table)
+    targets = []
+    for spec in to:
+        kind, _, location = spec.partition(":")
+        if not location:
+            raise typer.BadParameter(f"Target '{spec}' harus berbentuk jenis:lokasi.")
+        if kind in EXPORT_FORMATS:
+            targets.append(file_target(spec, location, kind, buffer, columns=export_columns(structure, row_filter),
+                                       types=export_types(structure)))
+            continue
+        target_schema, _, target_table = location.rpartition(".")
+        target_schema = target_schema or schema
+        # Koneksi baru per target, karena setiap target ditulis dari thread sendiri
+        handler = create_db_handler(kind)
+        try:
+            handler.create_schema(target_schema)
+        except Exception:
+            pass
+        try:
+            columns = project_structure(structure, row_filter)
+            if columns:
+                handler.create_table(target_schema, target_table, column_definitions(columns))
+        except Exception as e:
+            print(f"❗ Gagal membuat tabel {spec}: {e}")
+        target_keys = mongo_key_columns if kind == "mongo" else key_columns
+        # Governor per target: target yang sibuk melambat sendiri, yang lain tetap jalan sampai buffer penuh
+        target_governor = build_governor("target", handler, max_rows_per_sec, max_bytes_per_sec, max_latency,
+                                         protect, governor_file)
+        targets.append(db_target(spec, handler, target_schema, target_table, upsert, target_keys, buffer,
+                                 governor=target_governor))
+
+    source_governor = build_governor("source", source_handler, max_rows_per_sec, max_bytes_per_sec, max_latency,
+                                     protect, governor_file)
+    try:
+        fanout_transfer(source_handler, schema, table, targets, batch_size, row_filter, governor=source_governor)
+    except Exception as e:
+        print("❌ Gagal membaca source:", e)
+
+    for target in targets:
+        if target.error:
+            print(f"❌ {target.label}: gagal ({target.error}), {target.success} baris sempat ditulis.")
+        else:
+            print(f"✅ {target.label}: {target.success} dari {target.total} baris.")
+
+@app.command("transfer:stream")
+def transfer_stream(
+    source_db: str = typer.Option(..., help="Database source (mysql/postgres/mongo)"),
+    source_schema: str = typer.Option(DEFAULT_SCHEMA_NAME, help="Schema source"),
+    source_table: str = typer.Option(..., help="Tabel/collection source"),
+    target_db: str = typer.Option(..., help="Database target"),
+    target_schema: str = typer.Option(None, help="Schema target (default: sama dengan source)"),
+    target_table: str = typer.Option(None, help="Tabel target (default: sama dengan source)"),
+    key: str = typer.Option(None, help="Kolom key, pisahkan dengan koma (default: PRIMARY KEY source)"),
+    method: str = typer.Option("auto", help="auto/native/trigger (native: change stream, wal2json, binlog)"),
+    batch_size: int = typer.Option(1000, help="Maksimum perubahan per micro-batch"),
+    flush_seconds: float = typer.Option(1.0, help="Jeda maksimum sebelum micro-batch diterapkan"),
+    name: str = typer.Option(None, help="Nama state replikasi (default: <source_db>_<schema>_<table>)"),
+    max_rows_per_sec: float = typer.Option(None, help="Batas baris per detik (governor)"),
+    max_bytes_per_sec: float = typer.Option(None, help="Batas byte per detik (governor)"),
+    max_latency: float = typer.Option(None, help="Latensi per batch (detik) di atas ini membuat laju turun"),
+    protect: bool = typer.Option(False, "--protect", help="Mundur otomatis saat server sibuk (lag replika, Threads_running, timeout)"),
+    governor_file: str = typer.Option(None, help="File JSON untuk mengubah batas saat berjalan (jika ada batas lain: default GOVERNOR_CONTROL_FILE)"),
+):
+    """Replikasi perubahan source ke target secara terus-menerus (CDC). Muat data awal dulu dengan transfer."""
+    from db.replication import ReplicationState, open_source, stream_changes
+
+    if method not in ("auto", "native", "trigger"):
+        raise typer.BadParameter("Method harus auto/native/trigger.")
+    target_schema = target_schema or source_schema
+    target_table = target_table or source_table
+    name = name or f"{source_db}_{source_schema}_{source_table}"
+
+    source_handler = get_db_handler(source_db)
+    target_handler = get_db_handler(target_db)
+    key_columns = [k.strip() for k in key.split(",")] if key else source_handler.primary_key(source_schema, source_table)
+    if not key_columns:
+        print("❌ Tabel source tidak punya PRIMARY KEY, gunakan --key.")
+        raise typer.Exit(code=1)
+
+    state = ReplicationState(name)
+    try:
+        source = open_source(source_db, source_handler, source_schema, source_table, state.position,
+                             key_columns, method=method, slot=name)
+    except Exception as e:
+        print("❌ Gagal membuka sumber perubahan:", e)
+        raise typer.Exit(code=1)
+
+    print(f"📡 Mereplikasi {source_db}:{source_schema}.{source_table} → {target_db}:{target_schema}.{target_table} (Ctrl+C untuk berhenti)")
+    # Governor di sisi target: micro-batch ditahan saat target sibuk, perubahan menunggu di source
+    governor = build_governor("target", target_handler, max_rows_per_sec, max_bytes_per_sec, max_latency,
+                              protect, governor_file)
+    stream_changes(source, target_handler, target_schema, target_table, key_columns, state,
+                   batch_size=batch_size, flush_seconds=flush_seconds, governor=governor)
+
+@app.command("daemon:start")
+def daemon_start(
+    preload: str = typer.Option(None, help="Database yang langsung dihubungkan, contoh: mysql,postgres"),
+):
+    """Jalankan daemon dengan koneksi hangat; perintah CLI diteruskan ke sini otomatis"""
+    global HANDLER_POOL
+    HANDLER_POOL = daemon.HandlerPool(create_db_handler)
+    for db in filter(None, (preload or "").split(",")):
+        HANDLER_POOL.get(db.strip())
+    daemon.serve(typer.main.get_command(app), HANDLER_POOL)
+
+@app.command("daemon:stop")
+def daemon_stop():
+    try:
+        response = daemon.request({"cmd": "shutdown"})
+        print(response["stdout"], end="")
+    except (ConnectionError, FileNotFoundError):
+        print("📭 Daemon tidak berjalan.")
+
+@app.command("daemon:status")
+def daemon_status():
+    try:
+        daemon.request({"cmd": "ping"}, timeout=2)
+        print(f"✅ Daemon berjalan di {daemon.DAEMON_SOCKET}")
+    except (ConnectionError, FileNotFoundError, OSError):
+        print("📭 Daemon tidak berjalan.")
+
 if __name__ == "__main__":
     app()
\ No newline at end of file
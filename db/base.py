@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from .rowbatch import RowBatch
 
 class DatabaseHandler(ABC):
     @abstractmethod
@@ -11,4 +12,66 @@ class DatabaseHandler(ABC):
     def delete_schema(self, name: str): pass
     
     @abstractmethod
-    def create_table(self, schema: str, table_name: str, columns): pass
\ No newline at end of file
+    def create_table(self, schema: str, table_name: str, columns): pass
+
+    # Default: insert satu per satu, handler boleh override dengan versi bulk
+    max_batch_bytes = None
+
+    def insert_many(self, schema: str, table: str, rows) -> int:
+        if isinstance(rows, RowBatch):
+            rows = rows.to_dicts()
+        return sum(1 for row in rows if self.insert_data(schema, table, row))
+
+    def primary_key(self, schema: str, table: str) -> list[str]:
+        return []
+
+    def upsert_many(self, schema: str, table: str, rows, key_columns: list[str] = None) -> int:
+        raise NotImplementedError("Mode upsert belum didukung untuk database ini.")
+
+    def iter_batches(self, schema: str, table: str, batch_size: int = 1000, since: tuple = None,
+                     row_filter=None):
+        """Baca tabel per batch (RowBatch) tanpa memuat semuanya ke memori.
+
+        since=(kolom, nilai) hanya membaca baris dengan kolom > nilai (refresh inkremental).
+        row_filter (utils.filters.RowFilter) didorong ke server sebagai WHERE/proyeksi kolom.
+        """
+        raise NotImplementedError("Streaming belum didukung untuk database ini.")
+
+    def freshness_token(self, schema: str, table: str, watermark: str = None) -> dict:
+        """Penanda murah untuk mendeteksi perubahan tabel (tanpa scan lewat jaringan)."""
+        return {}
+
+    def delete_many(self, schema: str, table: str, key_columns: list[str], keys: list[tuple]) -> int:
+        raise NotImplementedError("Hapus massal belum didukung untuk database ini.")
+
+    def load_signal(self) -> float:
+        """Beban server relatif terhadap batas aman (>= 1 berarti kelebihan beban), None jika tidak tersedia."""
+        return None
+
+    # Change-log berbasis trigger (fallback CDC untuk database SQL)
+    def install_change_log(self, schema: str, table: str, key_columns: list[str]):
+        raise NotImplementedError("Change-log trigger tidak didukung untuk database ini.")
+
+    def read_change_log(self, schema: str, table: str, limit: int) -> list[tuple]:
+        """Entri (id, op, row) tertua yang masih ada di change-log."""
+        raise NotImplementedError("Change-log trigger tidak didukung untuk database ini.")
+
+    def purge_change_log(self, schema: str, table: str, ids: list[int]):
+        """Hapus entri yang sudah diterapkan, per id (bukan rentang)."""
+        pass
+
+    # Bulk load: simpan definisi index, lepas sebelum load, bangun ulang sesudahnya
+    @property
+    def engine_name(self) -> str:
+        # Atribut biasa, jadi tetap terbaca lewat proxy (mis. WarmHandler di daemon)
+        return type(self).__name__
+
+    def capture_indexes(self, schema: str, table: str) -> dict:
+        return {}
+
+    def drop_indexes(self, schema: str, table: str, state: dict, unlogged: bool = False):
+        pass
+
+    def restore_indexes(self, schema: str, table: str, state: dict) -> list:
+        """Kembalikan daftar (ddl, error) yang gagal dipulihkan."""
+        return []
@@ -1,16 +1,21 @@
 import os
 from cassandra.cluster import Cluster
 from cassandra.auth import PlainTextAuthProvider
+from cassandra.query import BatchStatement, BatchType, SimpleStatement
 from dotenv import load_dotenv
 from .base import DatabaseHandler
+from .rowbatch import RowBatch, as_rowbatch
+from utils.filters import RowFilter
 
 load_dotenv()
 
 class CassandraDB(DatabaseHandler):
-    def __init__(self):
+    def __init__(self, config: dict = None):
+        # config (dari transfer interaktif) menimpa pengaturan .env
+        config = config or {}
         self.cluster = Cluster(
-            contact_points=[os.getenv("CASSANDRA_HOST", "127.0.0.1")],
-            port=int(os.getenv("CASSANDRA_PORT", 9042))
+            contact_points=[config.get("host") or os.getenv("CASSANDRA_HOST", "127.0.0.1")],
+            port=int(config.get("port") or os.getenv("CASSANDRA_PORT", 9042))
         )
         self.session = self.cluster.connect()
 
@@ -76,15 +81,130 @@ class CassandraDB(DatabaseHandler):
             print("❌ Error:", e)
             return False
 
-    def read_data(self, schema: str, table: str):
+    # batch_size_fail_threshold_in_kb default Cassandra adalah 50KB
+    max_batch_bytes = int(os.getenv("CASSANDRA_MAX_BATCH_BYTES", 40 * 1024))
+
+    def insert_many(self, schema: str, table: str, rows) -> int:
+        self.batch_warnings = []
+        if not len(rows):
+            return 0
         self.session.set_keyspace(schema)
+        row_batch = as_rowbatch(rows)
+        columns = ', '.join(row_batch.columns)
+        placeholders = ', '.join(['?'] * len(row_batch.columns))
+        prepared = self.session.prepare(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})")
+        batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+        for row in row_batch.rows():
+            batch.add(prepared, row)
+        result = self.session.execute(batch)
+        # Hanya peringatan ukuran "Batch ... is of size ..., exceeding specified threshold";
+        # "Unlogged batch covering N partitions" tidak berhubungan dengan ukuran batch
+        warnings = result.response_future.warnings or []
+        self.batch_warnings = [w for w in warnings if "exceeding specified threshold" in w.lower()]
+        return len(rows)
+
+    def _key_columns(self, schema: str, table: str) -> tuple[list[str], list[str]]:
+        rows = self.session.execute(f"""
+            SELECT column_name, kind, position
+            FROM system_schema.columns
+            WHERE keyspace_name = '{schema}' AND table_name = '{table}'
+        """)
+        keys = sorted((r for r in rows if r.kind in ("partition_key", "clustering")), key=lambda r: r.position)
+        partition = [r.column_name for r in keys if r.kind == "partition_key"]
+        clustering = [r.column_name for r in keys if r.kind == "clustering"]
+        return partition, clustering
+
+    def primary_key(self, schema: str, table: str) -> list[str]:
+        partition, clustering = self._key_columns(schema, table)
+        return partition + clustering
+
+    def _select(self, schema: str, table: str, row_filter: RowFilter = None, since: tuple = None) -> tuple[str, list]:
+        select, conditions, params, filtering = "*", [], [], False
+        if row_filter:
+            select, conditions, params, filtering = row_filter.cql(*self._key_columns(schema, table))
+        if since:
+            conditions.append(f"{since[0]} > %s")
+            params.append(since[1])
+            filtering = True
+        query = f"SELECT {select} FROM {schema}.{table}"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        if filtering:
+            query += " ALLOW FILTERING"
+        return query, params or None
+
+    def upsert_many(self, schema: str, table: str, rows, key_columns: list[str] = None) -> int:
+        # INSERT di Cassandra sudah bersifat upsert berdasarkan PRIMARY KEY
+        return self.insert_many(schema, table, rows)
+
+    def delete_many(self, schema: str, table: str, key_columns: list[str], keys: list[tuple]) -> int:
+        if not keys:
+            return 0
+        where = ' AND '.join(f"{k} = ?" for k in key_columns)
+        prepared = self.session.prepare(f"DELETE FROM {schema}.{table} WHERE {where}")
+        batch = BatchStatement(batch_type=BatchType.UNLOGGED)
+        for key in keys:
+            batch.add(prepared, list(key))
+        self.session.execute(batch)
+        return len(keys)
+
+    def capture_indexes(self, schema: str, table: str) -> dict:
+        rows = self.session.execute(f"""
+            SELECT index_name, kind, options
+            FROM system_schema.indexes
+            WHERE keyspace_name = '{schema}' AND table_name = '{table}'
+        """)
+        indexes = []
+        for r in rows:
+            target = r.options.get("target")
+            if r.kind == "CUSTOM":
+                ddl = (f"CREATE CUSTOM INDEX IF NOT EXISTS {r.index_name} ON {schema}.{table} ({target}) "
+                       f"USING '{r.options.get('class_name')}'")
+            else:
+                ddl = f"CREATE INDEX IF NOT EXISTS {r.index_name} ON {schema}.{table} ({target})"
+            indexes.append((r.index_name, ddl))
+        return {"indexes": indexes}
+
+    def drop_indexes(self, schema: str, table: str, state: dict, unlogged: bool = False):
+        for name, _ in state["indexes"]:
+            self.session.execute(f"DROP INDEX IF EXISTS {schema}.{name}")
+
+    def restore_indexes(self, schema: str, table: str, state: dict) -> list:
+        # Jalankan semua CREATE INDEX sekaligus, Cassandra membangunnya di background
+        futures = [(ddl, self.session.execute_async(ddl)) for _, ddl in state["indexes"]]
+        failed = []
+        for ddl, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"❌ Gagal memulihkan: {ddl}\n   {e}")
+                failed.append((ddl, e))
+        return failed
+
+    def read_data(self, schema: str, table: str, row_filter: RowFilter = None):
         try:
-            rows = self.session.execute(f"SELECT * FROM {table}")
+            query, params = self._select(schema, table, row_filter)
+            rows = self.session.execute(query, params)
             return list(rows)
         except Exception as e:
             print("❌ Error:", e)
             return []
 
+    def iter_batches(self, schema: str, table: str, batch_size: int = 1000, since: tuple = None,
+                     row_filter: RowFilter = None):
+        # fetch_size mengaktifkan paging, halaman berikutnya diambil saat dibutuhkan
+        query, params = self._select(schema, table, row_filter, since)
+        statement = SimpleStatement(query, fetch_size=batch_size)
+        result = self.session.execute(statement, params)
+        # Satu halaman hasil = satu batch; baris named tuple langsung ditranspos ke kolom
+        while True:
+            rows = result.current_rows
+            if rows:
+                yield RowBatch.from_tuples(result.column_names, rows)
+            if not result.has_more_pages:
+                break
+            result.fetch_next_page()
+
     def update_data(self, schema: str, table: str, row_id: str, column: str, new_value: str):
         # Cassandra tidak mendukung UPDATE berdasarkan id yang tidak menjadi PRIMARY KEY
         print("⚠️ UPDATE hanya didukung jika kolom target adalah bagian dari PRIMARY KEY.")
@@ -0,0 +1,128 @@
+# Fan-out: satu pembacaan source dialirkan ke beberapa target sekaligus
+import queue
+import threading
+
+from rich.console import Console
+from rich.progress import BarColumn, Progress, TextColumn, TimeElapsedColumn
+
+from utils.batching import AdaptiveBatchSizer, write_batches
+from utils.export import EXPORT_FORMATS, write_export
+from utils.governor import governed
+
+console = Console()
+
+FANOUT_BUFFER = 8
+_DONE = object()
+
+
+class FanoutTarget:
+    """Satu tujuan fan-out: antrean terbatas + thread penulis sendiri."""
+
+    def __init__(self, label: str, write, buffer: int = FANOUT_BUFFER):
+        self.label = label
+        self.write = write  # fungsi(iterable batch) -> (berhasil, total)
+        self.queue = queue.Queue(maxsize=max(1, buffer))
+        self.error = None
+        self.success = self.total = 0
+        self.thread = self.task = None
+
+    def batches(self, progress, task):
+        """Ambil batch dari antrean; progress maju saat penulis meminta batch berikutnya."""
+        pending = 0
+        while True:
+            batch = self.queue.get()
+            progress.advance(task, pending)
+            if batch is _DONE:
+                return
+            pending = len(batch)
+            yield batch
+
+    def run(self, progress, task):
+        try:
+            self.success, self.total = self.write(self.batches(progress, task))
+            progress.update(task, description=f"[green]{self.label}")
+        except Exception as e:
+            # Target gagal tidak menghentikan target lain
+            self.error = e
+            progress.update(task, description=f"[red]{self.label} ❌")
+            self._drain()
+
+    def _drain(self):
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def offer(self, item) -> bool:
+        """Masukkan batch ke antrean; menunggu jika penuh (back-pressure), False jika target sudah gagal."""
+        while self.error is None:
+            try:
+                self.queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+
+def db_target(label: str, handler, schema: str, table: str, upsert: bool = False,
+              key_columns: list[str] = None, buffer: int = FANOUT_BUFFER, governor=None) -> FanoutTarget:
+    def write(batches):
+        # Setiap target punya batch sizer (dan governor) sendiri, menyesuaikan kecepatan database-nya
+        sizer = AdaptiveBatchSizer(max_bytes=getattr(handler, "max_batch_bytes", None))
+        return write_batches(handler, schema, table, batches, sizer, upsert=upsert, key_columns=key_columns,
+                             governor=governor)
+    return FanoutTarget(label, write, buffer)
+
+
+def file_target(label: str, path: str, fmt: str, buffer: int = FANOUT_BUFFER,
+                columns: list[str] = None, types: dict = None) -> FanoutTarget:
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format '{fmt}' tidak didukung. Gunakan {'/'.join(EXPORT_FORMATS)}.")
+
+    def write(batches):
+        with open(path, "wb") as f:
+            count = write_export(f, batches, fmt, columns, types)
+        return count, count
+    return FanoutTarget(label, write, buffer)
+
+
+def fanout_transfer(source, schema: str, table: str, targets: list[FanoutTarget],
+                    batch_size: int = 1000, row_filter=None, governor=None) -> list[FanoutTarget]:
+    """Baca source sekali dan kirim setiap batch ke semua target yang masih hidup.
+
+    Target lambat hanya menahan source setelah antreannya (buffer batch) penuh.
+    """
+    columns = [TextColumn("{task.description}"), BarColumn(), TextColumn("{task.completed:,.0f} baris"),
+               TimeElapsedColumn()]
+    with Progress(*columns, console=console) as progress:
+        for target in targets:
+            target.task = progress.add_task(target.label, total=None)
+            target.thread = threading.Thread(target=target.run, args=(progress, target.task), daemon=True)
+            target.thread.start()
+
+        read_task = progress.add_task("[cyan]source", total=None)
+        source_error = None
+        try:
+            batches = governed(source.iter_batches(schema, table, batch_size, row_filter=row_filter), governor)
+            for batch in batches:
+                alive = [target for target in targets if target.offer(batch)]
+                if not alive:
+                    break
+                progress.advance(read_task, len(batch))
+        except Exception as e:
+            source_error = e
+            progress.update(read_task, description="[red]source ❌")
+        finally:
+            for target in targets:
+                target.offer(_DONE)
+            for target in targets:
+                target.thread.join()
+        if source_error is not None:
+            # Target hanya menerima sebagian data: tandai gagal, bukan selesai
+            for target in targets:
+                if target.error is None:
+                    target.error = RuntimeError(f"source gagal dibaca: {source_error}")
+                    progress.update(target.task, description=f"[red]{target.label} ❌")
+            raise source_error
+    return targets
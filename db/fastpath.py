@@ -0,0 +1,194 @@
+# Jalur cepat untuk transfer antar database dengan engine yang sama (tanpa decode ke objek Python)
+import os
+import threading
+import time
+
+from utils.batching import write_batches
+
+MONGO_RAW_BATCH_BYTES = int(os.getenv("MONGODB_RAW_BATCH_BYTES", 16 * 1024 * 1024))
+MYSQL_BULK_ROWS = int(os.getenv("MYSQL_BULK_ROWS", 5000))
+
+
+class FastPathError(RuntimeError):
+    """Jalur cepat gagal; written = jumlah baris yang mungkin sudah masuk ke target."""
+
+    def __init__(self, error: Exception, written: int = 0):
+        super().__init__(str(error))
+        self.error = error
+        self.written = written
+
+
+def _source_columns(source, schema: str, table: str, quote: str) -> str:
+    """Kolom source urut ordinal_position, disebut eksplisit di kedua sisi.
+
+    Tanpa daftar kolom data dipasangkan berdasarkan posisi, sehingga tabel target dengan urutan
+    kolom berbeda akan terisi ke kolom yang salah.
+    """
+    try:
+        columns = [col["Column"] for col in source.describe_table(schema, table)]
+    except Exception as e:
+        raise FastPathError(e) from e
+    if not columns:
+        raise FastPathError(ValueError(f"Tabel '{schema}.{table}' tidak ditemukan di source."))
+    return ', '.join(f"{quote}{col}{quote}" for col in columns)
+
+
+def pg_copy_pipe(source, target, src_schema: str, src_table: str, dst_schema: str, dst_table: str) -> int:
+    """COPY TO STDOUT (binary) di source langsung dialirkan ke COPY FROM STDIN di target.
+
+    Data melewati os.pipe, jadi buffer dibatasi kernel (~64KB) dan tidak pernah di-decode.
+    COPY adalah satu statement, jadi jika gagal tidak ada baris yang tertinggal di target.
+    """
+    columns = _source_columns(source, src_schema, src_table, '"')
+    read_fd, write_fd = os.pipe()
+    errors = []
+
+    def produce():
+        with os.fdopen(write_fd, "wb") as writer:
+            try:
+                source.cursor.copy_expert(f"COPY {src_schema}.{src_table} ({columns}) TO STDOUT (FORMAT binary)",
+                                          writer)
+            except Exception as e:
+                errors.append(e)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    with os.fdopen(read_fd, "rb") as reader:
+        try:
+            target.cursor.copy_expert(f"COPY {dst_schema}.{dst_table} ({columns}) FROM STDIN (FORMAT binary)", reader)
+        except Exception as e:
+            raise FastPathError(errors[0] if errors else e) from e
+        finally:
+            reader.close()  # jika target gagal, producer berhenti karena pipe tertutup
+            producer.join()
+    if errors:
+        raise FastPathError(errors[0])
+    return target.cursor.rowcount
+
+
+def mongo_raw_copy(source, target, src_schema: str, src_table: str, dst_schema: str, dst_table: str,
+                   batch_size: int = 1000) -> int:
+    """Baca dokumen sebagai RawBSONDocument dan tulis ulang apa adanya, tanpa decode BSON."""
+    from bson.codec_options import CodecOptions
+    from bson.raw_bson import RawBSONDocument
+
+    raw = CodecOptions(document_class=RawBSONDocument)
+    collection = source.client[src_schema].get_collection(src_table, codec_options=raw)
+    destination = target.client[dst_schema].get_collection(dst_table, codec_options=raw)
+
+    count = 0
+    batch, batch_bytes = [], 0
+    try:
+        for doc in collection.find().batch_size(batch_size):
+            batch.append(doc)
+            batch_bytes += len(doc.raw)
+            if len(batch) >= batch_size or batch_bytes >= MONGO_RAW_BATCH_BYTES:
+                count += len(destination.insert_many(batch, ordered=False).inserted_ids)
+                batch, batch_bytes = [], 0
+        if batch:
+            count += len(destination.insert_many(batch, ordered=False).inserted_ids)
+    except Exception as e:
+        # insert_many yang gagal di tengah bisa sudah menulis sebagian batch
+        in_flight = e.details.get("nInserted", 0) if hasattr(e, "details") and e.details else len(batch)
+        raise FastPathError(e, count + in_flight) from e
+    return count
+
+
+def mysql_bulk_copy(source, target, src_schema: str, src_table: str, dst_schema: str, dst_table: str,
+                    batch_size: int = MYSQL_BULK_ROWS) -> int:
+    """Server sama: INSERT ... SELECT di server. Server beda: alirkan tuple mentah sebagai INSERT multi-row."""
+    columns = _source_columns(source, src_schema, src_table, "`")
+    # Bandingkan tujuan koneksi yang benar-benar dipakai, bukan konfigurasi dari env
+    same_server = ((source.conn.host, source.conn.port, source.conn.unix_socket)
+                   == (target.conn.host, target.conn.port, target.conn.unix_socket))
+    if same_server:
+        try:
+            target.cursor.execute(f"INSERT INTO `{dst_schema}`.`{dst_table}` ({columns}) "
+                                  f"SELECT {columns} FROM `{src_schema}`.`{src_table}`")
+            target.conn.commit()
+        except Exception as e:
+            target.conn.rollback()
+            raise FastPathError(e) from e
+        return target.cursor.rowcount
+
+    import pymysql
+
+    cursor = source.conn.cursor(pymysql.cursors.SSCursor)
+    count = 0
+    try:
+        cursor.execute(f"SELECT {columns} FROM `{src_schema}`.`{src_table}`")
+        placeholders = ', '.join(['%s'] * len(cursor.description))
+        query = f"INSERT INTO `{dst_schema}`.`{dst_table}` ({columns}) VALUES ({placeholders})"
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            target.cursor.executemany(query, rows)
+            target.conn.commit()
+            count += len(rows)
+    except Exception as e:
+        # Batch yang belum di-commit dibatalkan; batch sebelumnya sudah tersimpan di target
+        target.conn.rollback()
+        raise FastPathError(e, count) from e
+    finally:
+        cursor.close()
+    return count
+
+
+FAST_PATHS = {
+    "postgres": pg_copy_pipe,
+    "mongodb": mongo_raw_copy,
+    "mongo": mongo_raw_copy,
+    "mysql": mysql_bulk_copy,
+}
+
+
+def get_fast_path(source_type: str, target_type: str):
+    """Fungsi jalur cepat jika source dan target memakai engine yang sama, selain itu None."""
+    if source_type != target_type:
+        return None
+    return FAST_PATHS.get(source_type)
+
+
+def generic_copy(source, target, src_schema: str, src_table: str, dst_schema: str, dst_table: str) -> int:
+    # Batch RowBatch dari source diteruskan apa adanya, tanpa dict per baris
+    success, _ = write_batches(target, dst_schema, dst_table, source.iter_batches(src_schema, src_table))
+    return success
+
+
+def benchmark(db_type: str, handler, schema: str, table: str) -> list[tuple[str, int, float]]:
+    """Salin tabel ke dua tabel sementara (jalur cepat vs generik) dan ukur waktunya."""
+    fast = get_fast_path(db_type, db_type)
+    # Koneksi terpisah untuk target, source dan target berjalan bersamaan
+    target = type(handler)()
+    results = []
+    for label, copy in (("fast", fast), ("generic", generic_copy)):
+        if copy is None:
+            continue
+        scratch = f"{table}_bench_{label}"
+        _clone_structure(db_type, handler, schema, table, scratch)
+        try:
+            started = time.perf_counter()
+            count = copy(handler, target, schema, table, schema, scratch)
+            results.append((label, count, time.perf_counter() - started))
+        finally:
+            _drop_scratch(db_type, handler, schema, scratch)
+    return results
+
+
+def _clone_structure(db_type: str, handler, schema: str, table: str, scratch: str):
+    if db_type == "postgres":
+        handler.cursor.execute(f"DROP TABLE IF EXISTS {schema}.{scratch}")
+        handler.cursor.execute(f"CREATE TABLE {schema}.{scratch} (LIKE {schema}.{table} INCLUDING ALL)")
+    elif db_type == "mysql":
+        handler.cursor.execute(f"DROP TABLE IF EXISTS `{schema}`.`{scratch}`")
+        handler.cursor.execute(f"CREATE TABLE `{schema}`.`{scratch}` LIKE `{schema}`.`{table}`")
+    elif db_type in ("mongo", "mongodb"):
+        handler.client[schema].drop_collection(scratch)
+
+
+def _drop_scratch(db_type: str, handler, schema: str, scratch: str):
+    if db_type in ("mongo", "mongodb"):
+        handler.client[schema].drop_collection(scratch)
+    else:
+        handler.delete_table(schema, scratch)
@@ -1,17 +1,30 @@
 # Implementasi MongoDB untuk DatabaseHandler
 import os
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import MongoClient, IndexModel, ReplaceOne
+from pymongo.errors import BulkWriteError
 from bson.objectid import ObjectId
 from .base import DatabaseHandler
+from .rowbatch import RowBatch
+from utils.filters import RowFilter
 
 load_dotenv()
 
 class MongoDB(DatabaseHandler):
-    def __init__(self):
-        self.client = MongoClient(
-            os.getenv("MONGODB_URI", "mongodb://localhost:27017/"),
-        )
+    def __init__(self, config: dict = None):
+        # config (dari transfer interaktif) menimpa pengaturan .env
+        config = config or {}
+        if config.get("host"):
+            self.client = MongoClient(
+                host=config["host"],
+                port=int(config.get("port") or 27017),
+                username=config.get("user") or None,
+                password=config.get("password") or None,
+            )
+        else:
+            self.client = MongoClient(
+                os.getenv("MONGODB_URI", "mongodb://localhost:27017/"),
+            )
 
     def create_schema(self, name: str):
         self.client[name]
@@ -53,9 +66,115 @@ class MongoDB(DatabaseHandler):
             print("❌ Error:", e)
             return False
 
-    def read_data(self, schema: str, table: str) -> list:
+    # Batas pesan MongoDB 48MB, dokumen tunggal 16MB
+    max_batch_bytes = int(os.getenv("MONGODB_MAX_BATCH_BYTES", 32 * 1024 * 1024))
+
+    def insert_many(self, schema: str, table: str, rows) -> int:
+        if not len(rows):
+            return 0
+        if isinstance(rows, RowBatch):
+            # Field yang tidak ada di dokumen asal tidak ditambahkan; nilai None asli tetap ditulis
+            rows = rows.to_documents()
+        db = self.client[schema]
+        try:
+            result = db[table].insert_many(rows, ordered=False)
+        except BulkWriteError as e:
+            # ordered=False tetap menulis dokumen lain, jangan diulang
+            for err in e.details.get("writeErrors", []):
+                print("❌ Error:", err.get("errmsg"))
+            return e.details.get("nInserted", 0)
+        return len(result.inserted_ids)
+
+    def primary_key(self, schema: str, table: str) -> list[str]:
+        return ["_id"]
+
+    def upsert_many(self, schema: str, table: str, rows, key_columns: list[str] = None) -> int:
+        if not len(rows):
+            return 0
+        if isinstance(rows, RowBatch):
+            rows = rows.to_documents()
+        key_columns = key_columns or self.primary_key(schema, table)
+        # Dokumen tanpa key akan menjadi duplikat setiap kali diulang, jadi ditolak
+        # (mis. baris SQL/CSV tanpa _id: gunakan PRIMARY KEY source atau --key)
+        missing = sum(1 for row in rows if not all(k in row for k in key_columns))
+        if missing:
+            raise ValueError(f"{missing} dokumen tidak punya key {', '.join(key_columns)}, gunakan --key.")
+        operations = [ReplaceOne({k: row[k] for k in key_columns}, row, upsert=True) for row in rows]
+        db = self.client[schema]
+        try:
+            db[table].bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get("writeErrors", []):
+                print("❌ Error:", err.get("errmsg"))
+            return len(rows) - len(e.details.get("writeErrors", []))
+        return len(rows)
+
+    def delete_many(self, schema: str, table: str, key_columns: list[str], keys: list[tuple]) -> int:
+        if not keys:
+            return 0
+        if len(key_columns) == 1:
+            query = {key_columns[0]: {"$in": [key[0] for key in keys]}}
+        else:
+            query = {"$or": [dict(zip(key_columns, key)) for key in keys]}
+        return self.client[schema][table].delete_many(query).deleted_count
+
+    def capture_indexes(self, schema: str, table: str) -> dict:
+        info = self.client[schema][table].index_information()
+        indexes = []
+        for name, spec in info.items():
+            if name == "_id_" or spec.get("unique"):
+                # Index unique tetap ada supaya upsert/insert tidak menghasilkan duplikat
+                continue
+            options = {k: v for k, v in spec.items() if k not in ("key", "v", "ns")}
+            indexes.append(IndexModel(spec["key"], name=name, **options))
+        return {"indexes": indexes}
+
+    def drop_indexes(self, schema: str, table: str, state: dict, unlogged: bool = False):
+        collection = self.client[schema][table]
+        for index in state["indexes"]:
+            collection.drop_index(index.document["name"])
+
+    def restore_indexes(self, schema: str, table: str, state: dict) -> list:
+        if not state["indexes"]:
+            return []
+        try:
+            # createIndexes membangun semua index dalam satu perintah
+            self.client[schema][table].create_indexes(state["indexes"])
+        except Exception as e:
+            print(f"❌ Gagal memulihkan index: {e}")
+            for index in state["indexes"]:
+                print(f"   {index.document}")
+            return [(index.document, e) for index in state["indexes"]]
+        return []
+
+    def read_data(self, schema: str, table: str, row_filter: RowFilter = None) -> list:
         db = self.client[schema]
-        return list(db[table].find())
+        query, projection = row_filter.mongo() if row_filter else ({}, None)
+        return list(db[table].find(query, projection))
+
+    def iter_batches(self, schema: str, table: str, batch_size: int = 1000, since: tuple = None,
+                     row_filter: RowFilter = None):
+        query, projection = row_filter.mongo() if row_filter else ({}, None)
+        if since:
+            query = {"$and": [query, {since[0]: {"$gt": since[1]}}]} if query else {since[0]: {"$gt": since[1]}}
+        cursor = self.client[schema][table].find(query, projection).batch_size(batch_size)
+        batch = []
+        for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                yield RowBatch.from_dicts(batch)
+                batch = []
+        if batch:
+            yield RowBatch.from_dicts(batch)
+
+    def freshness_token(self, schema: str, table: str, watermark: str = None) -> dict:
+        # _id terbesar + jumlah dokumen tidak melihat update di tempat, jadi tanpa watermark
+        # (mis. updated_at) snapshot divalidasi berdasarkan SNAPSHOT_TTL
+        if not watermark:
+            return {}
+        collection = self.client[schema][table]
+        latest = collection.find_one({watermark: {"$exists": True}}, sort=[(watermark, -1)], projection={watermark: 1})
+        return {"rows": collection.estimated_document_count(), "watermark": latest[watermark] if latest else None}
 
     def update_data(self, schema: str, table: str, row_id: str, column: str, new_value: str):
         db = self.client[schema]
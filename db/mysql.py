@@ -1,18 +1,29 @@
 import os
+import json
 import pymysql
 from dotenv import load_dotenv
 from .base import DatabaseHandler
+from .rowbatch import RowBatch, as_rowbatch
+from utils.filters import RowFilter, sql_query
 
 load_dotenv()
 
+
+def _quote(name: str) -> str:
+    return f"`{name}`"
+
+
 class MySQLDB(DatabaseHandler):
-    def __init__(self):
-        self.conn = pymysql.connect(
-            host=os.getenv("MYSQL_HOST", "localhost"),
-            user=os.getenv("MYSQL_USER", "root"),
-            password=os.getenv("MYSQL_PASSWORD", ""),
-            port=int(os.getenv("MYSQL_PORT", 3306)),
+    def __init__(self, config: dict = None):
+        # config (dari transfer interaktif) menimpa pengaturan .env
+        config = config or {}
+        self.conn_params = dict(
+            host=config.get("host") or os.getenv("MYSQL_HOST", "localhost"),
+            user=config.get("user") or os.getenv("MYSQL_USER", "root"),
+            password=config.get("password") or os.getenv("MYSQL_PASSWORD", ""),
+            port=int(config.get("port") or os.getenv("MYSQL_PORT", 3306)),
         )
+        self.conn = pymysql.connect(**self.conn_params)
         self.cursor = self.conn.cursor()
         
     def create_schema(self, name: str):
@@ -70,6 +81,7 @@ class MySQLDB(DatabaseHandler):
                 EXTRA AS 'Extra'
             FROM INFORMATION_SCHEMA.COLUMNS
             WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s
+            ORDER BY ORDINAL_POSITION
         """
         self.cursor.execute(query, (schema, table))
         columns = [col[0] for col in self.cursor.description]
@@ -94,21 +106,223 @@ class MySQLDB(DatabaseHandler):
         except Exception as e:
             print("❌ Error:", e)
             return False
-    
-    def read_data(self, schema: str, table: str) -> list:
+
+    # Default max_allowed_packet di MySQL lama 4MB
+    max_batch_bytes = int(os.getenv("MYSQL_MAX_BATCH_BYTES", 4 * 1024 * 1024))
+    # Threads_running di atas angka ini dianggap server sedang sibuk (dipakai governor)
+    max_threads_running = int(os.getenv("MYSQL_MAX_THREADS_RUNNING", 32))
+
+    def insert_many(self, schema: str, table: str, rows) -> int:
+        if not len(rows):
+            return 0
+        batch = as_rowbatch(rows)
+        columns = ', '.join(f"`{col}`" for col in batch.columns)
+        placeholders = ', '.join(['%s'] * len(batch.columns))
+        values = list(batch.rows())
+        # executemany PyMySQL menggabungkan ini menjadi INSERT multi-row
+        query = f"INSERT INTO `{schema}`.`{table}` ({columns}) VALUES ({placeholders})"
+        try:
+            self.cursor.executemany(query, values)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return len(rows)
+
+    def primary_key(self, schema: str, table: str) -> list[str]:
+        query = """
+            SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND CONSTRAINT_NAME = 'PRIMARY'
+            ORDER BY ORDINAL_POSITION
+        """
+        self.cursor.execute(query, (schema, table))
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def upsert_many(self, schema: str, table: str, rows, key_columns: list[str] = None) -> int:
+        # MySQL selalu mencocokkan lewat PRIMARY KEY / UNIQUE milik tabel; --key tidak mengubah
+        # pencocokan, key_columns hanya dikecualikan dari UPDATE
+        if not len(rows):
+            return 0
+        batch = as_rowbatch(rows)
+        keys = batch.columns
+        key_columns = key_columns or self.primary_key(schema, table)
+        columns = ', '.join(f"`{col}`" for col in keys)
+        placeholders = ', '.join(['%s'] * len(keys))
+        # Row alias (MySQL 8.0.19+) menggantikan VALUES(col) yang sudah deprecated
+        updates = [f"`{col}` = `_new`.`{col}`" for col in keys if col not in key_columns]
+        if not updates:
+            updates = [f"`{keys[0]}` = `{keys[0]}`"]
+        values = list(batch.rows())
+        query = (f"INSERT INTO `{schema}`.`{table}` ({columns}) VALUES ({placeholders}) AS `_new` "
+                 f"ON DUPLICATE KEY UPDATE {', '.join(updates)}")
+        try:
+            self.cursor.executemany(query, values)
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return len(rows)
+
+    def delete_many(self, schema: str, table: str, key_columns: list[str], keys: list[tuple]) -> int:
+        if not keys:
+            return 0
+        columns = ', '.join(f"`{k}`" for k in key_columns)
+        row = '(' + ', '.join(['%s'] * len(key_columns)) + ')'
+        query = f"DELETE FROM `{schema}`.`{table}` WHERE ({columns}) IN ({', '.join([row] * len(keys))})"
+        try:
+            self.cursor.execute(query, [value for key in keys for value in key])
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return self.cursor.rowcount
+
+    def install_change_log(self, schema: str, table: str, key_columns: list[str]):
+        log_table = f"_cdc_{table}"
+        self.cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS `{schema}`.`{log_table}` (
+                id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                op CHAR(1) NOT NULL,
+                row_data JSON NOT NULL
+            )
+        """)
+        columns = [col["Column"] for col in self.describe_table(schema, table)]
+        for op, event, ref in (("I", "INSERT", "NEW"), ("U", "UPDATE", "NEW"), ("D", "DELETE", "OLD")):
+            # Baris yang dihapus cukup disimpan key-nya
+            cols = key_columns if op == "D" else columns
+            payload = ', '.join(f"'{c}', {ref}.`{c}`" for c in cols)
+            self.cursor.execute(f"DROP TRIGGER IF EXISTS `{schema}`.`{log_table}_{op.lower()}`")
+            self.cursor.execute(f"""
+                CREATE TRIGGER `{schema}`.`{log_table}_{op.lower()}` AFTER {event} ON `{schema}`.`{table}`
+                FOR EACH ROW INSERT INTO `{schema}`.`{log_table}` (op, row_data) VALUES ('{op}', JSON_OBJECT({payload}))
+            """)
+        self.conn.commit()
+
+    def read_change_log(self, schema: str, table: str, limit: int) -> list[tuple]:
+        # Tidak memakai "id > terakhir": id AUTO_INCREMENT bisa commit tidak berurutan, baris yang
+        # commit terlambat tetap terbaca karena hanya id yang sudah diterapkan yang dihapus
+        self.cursor.execute(f"SELECT id, op, row_data FROM `{schema}`.`_cdc_{table}` ORDER BY id LIMIT %s", (limit,))
+        self.conn.commit()  # akhiri snapshot REPEATABLE READ agar baris baru terlihat
+        return [(id_, op, json.loads(data)) for id_, op, data in self.cursor.fetchall()]
+
+    def purge_change_log(self, schema: str, table: str, ids: list[int]):
+        if not ids:
+            return
+        placeholders = ', '.join(['%s'] * len(ids))
+        self.cursor.execute(f"DELETE FROM `{schema}`.`_cdc_{table}` WHERE id IN ({placeholders})", ids)
+        self.conn.commit()
+
+    def capture_indexes(self, schema: str, table: str) -> dict:
+        # Hanya index non-unique; UNIQUE tetap ada supaya data tetap konsisten
+        query = """
+            SELECT INDEX_NAME, COLUMN_NAME, SUB_PART, INDEX_TYPE
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND NON_UNIQUE = 1
+            ORDER BY INDEX_NAME, SEQ_IN_INDEX
+        """
+        self.cursor.execute(query, (schema, table))
+        indexes, skipped = {}, set()
+        for name, column, sub_part, index_type in self.cursor.fetchall():
+            if column is None:
+                # Index fungsional (MySQL 8.0.13+) tidak punya COLUMN_NAME, biarkan tetap ada
+                skipped.add(name)
+                continue
+            part = f"`{column}`({sub_part})" if sub_part else f"`{column}`"
+            _, parts = indexes.setdefault(name, [index_type, []])
+            parts.append(part)
+
+        definitions = []
+        for name, (index_type, parts) in indexes.items():
+            if name in skipped:
+                continue
+            prefix = f"{index_type} INDEX" if index_type in ("FULLTEXT", "SPATIAL") else "INDEX"
+            definitions.append((name, f"ADD {prefix} `{name}` ({', '.join(parts)})"))
+        return {"indexes": definitions}
+
+    def drop_indexes(self, schema: str, table: str, state: dict, unlogged: bool = False):
+        self.cursor.execute("SET SESSION foreign_key_checks = 0")
+        self.cursor.execute("SET SESSION unique_checks = 0")
+        dropped = []
+        for name, definition in state["indexes"]:
+            try:
+                self.cursor.execute(f"ALTER TABLE `{schema}`.`{table}` DROP INDEX `{name}`")
+                dropped.append((name, definition))
+            except Exception as e:
+                # Misalnya index yang dibutuhkan FOREIGN KEY, biarkan tetap ada
+                print(f"⚠️ Index '{name}' tidak dilepas:", e)
+        state["indexes"] = dropped
+        self.conn.commit()
+
+    def restore_indexes(self, schema: str, table: str, state: dict) -> list:
+        failed = []
+        try:
+            if state["indexes"]:
+                # Satu ALTER TABLE membangun semua index dalam satu kali scan tabel
+                additions = ', '.join(definition for _, definition in state["indexes"])
+                self.cursor.execute(f"ALTER TABLE `{schema}`.`{table}` {additions}")
+                self.conn.commit()
+        except Exception as e:
+            print(f"❌ Gagal memulihkan index: {e}")
+            for _, definition in state["indexes"]:
+                print(f"   ALTER TABLE `{schema}`.`{table}` {definition}")
+                failed.append((f"ALTER TABLE `{schema}`.`{table}` {definition}", e))
+        finally:
+            self.cursor.execute("SET SESSION unique_checks = 1")
+            self.cursor.execute("SET SESSION foreign_key_checks = 1")
+        return failed
+
+    def read_data(self, schema: str, table: str, row_filter: RowFilter = None) -> list:
         try:
-            self.cursor.execute(f"USE `{schema}`;")
-            self.cursor.execute(f"SELECT * FROM `{table}`;")
+            query, params = sql_query(f"`{schema}`.`{table}`", row_filter, _quote)
+            self.cursor.execute(query, params)
             rows = self.cursor.fetchall()
             return rows
         except Exception as e:
             print("❌ Error:", e)
             return []
     
+    def iter_batches(self, schema: str, table: str, batch_size: int = 1000, since: tuple = None,
+                     row_filter: RowFilter = None):
+        # SSCursor membaca hasil dari server sedikit demi sedikit (unbuffered)
+        cursor = self.conn.cursor(pymysql.cursors.SSCursor)
+        query, params = sql_query(f"`{schema}`.`{table}`", row_filter, _quote, since)
+        try:
+            cursor.execute(query, params)
+            columns = [col[0] for col in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield RowBatch.from_tuples(columns, rows)
+        finally:
+            cursor.close()
+
+    def freshness_token(self, schema: str, table: str, watermark: str = None) -> dict:
+        # TABLE_ROWS hanya estimasi dan CHECKSUM TABLE memindai seluruh tabel, jadi tanpa
+        # watermark tidak ada penanda murah: snapshot divalidasi berdasarkan SNAPSHOT_TTL
+        if not watermark:
+            return {}
+        self.cursor.execute(
+            "SELECT TABLE_ROWS FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s",
+            (schema, table),
+        )
+        row = self.cursor.fetchone()
+        self.cursor.execute(f"SELECT MAX(`{watermark}`) FROM `{schema}`.`{table}`")
+        return {"rows": row[0] if row else None, "watermark": self.cursor.fetchone()[0]}
+
+    def load_signal(self) -> float:
+        # Koneksi terpisah: koneksi utama bisa sedang dipakai streaming SSCursor
+        if getattr(self, "_signal_conn", None) is None:
+            self._signal_conn = pymysql.connect(**self.conn_params)
+        with self._signal_conn.cursor() as cursor:
+            cursor.execute("SHOW GLOBAL STATUS LIKE 'Threads_running'")
+            row = cursor.fetchone()
+        return int(row[1]) / self.max_threads_running if row else None
+
     def update_data(self, schema: str, table: str, row_id: int, column: str, new_value: str):
         try:
             # Menggunakan query untuk memperbarui data
-            query = f"UPDATE `{table}` SET `{column}` = %s WHERE id = %s"
+            query = f"UPDATE `{schema}`.`{table}` SET `{column}` = %s WHERE id = %s"
             self.cursor.execute(query, (new_value, row_id))
             self.conn.commit()
         except Exception as e:
@@ -117,7 +331,7 @@ class MySQLDB(DatabaseHandler):
     
     def delete_data(self, schema: str, table: str, row_id: int) -> bool:
         try:
-            query = f"DELETE FROM `{table}` WHERE id = %s"
+            query = f"DELETE FROM `{schema}`.`{table}` WHERE id = %s"
             self.cursor.execute(query, (row_id,))
             self.conn.commit()
             return self.cursor.rowcount > 0
@@ -1,19 +1,32 @@
 import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 import psycopg2
+from psycopg2.extras import execute_values
 from dotenv import load_dotenv
 from .base import DatabaseHandler
+from .rowbatch import RowBatch, as_rowbatch
+from utils.filters import RowFilter, sql_query
 
 load_dotenv()
 
+
+def _quote(name: str) -> str:
+    return f'"{name}"'
+
+
 class PostgreSQLDB(DatabaseHandler):
-    def __init__(self):
-        self.conn = psycopg2.connect(
-            host=os.getenv("POSTGRESQL_HOST"),
-            user=os.getenv("POSTGRESQL_USER"),
-            password=os.getenv("POSTGRESQL_PASSWORD"),
-            database=os.getenv("POSTGRESQL_DATABASE"),
-            port=int(os.getenv("POSTGRESQL_PORT", 5432))
+    def __init__(self, config: dict = None):
+        # config (dari transfer interaktif) menimpa pengaturan .env
+        config = config or {}
+        self.conn_params = dict(
+            host=config.get("host") or os.getenv("POSTGRESQL_HOST"),
+            user=config.get("user") or os.getenv("POSTGRESQL_USER"),
+            password=config.get("password") or os.getenv("POSTGRESQL_PASSWORD"),
+            database=config.get("database") or os.getenv("POSTGRESQL_DATABASE"),
+            port=int(config.get("port") or os.getenv("POSTGRESQL_PORT", 5432))
         )
+        self.conn = psycopg2.connect(**self.conn_params)
         self.conn.autocommit = True
         self.cursor = self.conn.cursor()
     
@@ -70,6 +83,7 @@ class PostgreSQLDB(DatabaseHandler):
                 column_default AS "Default"
             FROM information_schema.columns
             WHERE table_schema = %s AND table_name = %s
+            ORDER BY ordinal_position
         """
         self.cursor.execute(query, (schema, table))
         columns = [desc[0] for desc in self.cursor.description]
@@ -95,16 +109,246 @@ class PostgreSQLDB(DatabaseHandler):
             print("❌ Error:", e)
             self.conn.rollback()
             return False
-    
-    def read_data(self, schema: str, table: str):
+
+    max_batch_bytes = int(os.getenv("POSTGRESQL_MAX_BATCH_BYTES", 64 * 1024 * 1024))
+    # Lag replika (detik) di atas angka ini dianggap primary kelebihan beban (dipakai governor)
+    max_replication_lag = float(os.getenv("POSTGRESQL_MAX_REPLICATION_LAG", 10))
+
+    def insert_many(self, schema: str, table: str, rows) -> int:
+        if not len(rows):
+            return 0
+        batch = as_rowbatch(rows)
+        columns = ', '.join(f'"{k}"' for k in batch.columns)
+        values = list(batch.rows())
+        query = f"INSERT INTO {schema}.{table} ({columns}) VALUES %s"
+        try:
+            execute_values(self.cursor, query, values, page_size=len(values))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return len(rows)
+
+    def primary_key(self, schema: str, table: str) -> list[str]:
+        query = """
+            SELECT a.attname
+            FROM pg_index i
+            JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = ANY(i.indkey)
+            WHERE i.indrelid = %s::regclass AND i.indisprimary
+            ORDER BY array_position(i.indkey, a.attnum)
+        """
+        self.cursor.execute(query, (f"{schema}.{table}",))
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def upsert_many(self, schema: str, table: str, rows, key_columns: list[str] = None) -> int:
+        if not len(rows):
+            return 0
+        key_columns = key_columns or self.primary_key(schema, table)
+        if not key_columns:
+            raise ValueError(f"Tabel '{schema}.{table}' tidak punya PRIMARY KEY, gunakan --key.")
+        batch = as_rowbatch(rows)
+        keys = batch.columns
+        absent = [k for k in key_columns if k not in keys]
+        if absent:
+            raise ValueError(f"Kolom key {', '.join(absent)} tidak ada di data yang di-upsert ke '{schema}.{table}'.")
+
+        # ON CONFLICT tidak boleh menyentuh baris yang sama dua kali dalam satu perintah
+        key_index = [keys.index(k) for k in key_columns]
+        deduped = {}
+        for row in batch.rows():
+            deduped[tuple(row[i] for i in key_index)] = row
+        values = list(deduped.values())
+
+        columns = ', '.join(f'"{k}"' for k in keys)
+        conflict = ', '.join(f'"{k}"' for k in key_columns)
+        updates = ', '.join(f'"{k}" = EXCLUDED."{k}"' for k in keys if k not in key_columns)
+        action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+        query = f"INSERT INTO {schema}.{table} ({columns}) VALUES %s ON CONFLICT ({conflict}) {action}"
+        try:
+            execute_values(self.cursor, query, values, page_size=len(values))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return len(rows)
+
+    def delete_many(self, schema: str, table: str, key_columns: list[str], keys: list[tuple]) -> int:
+        if not keys:
+            return 0
+        columns = ', '.join(f'"{k}"' for k in key_columns)
         try:
-            self.cursor.execute(f"SELECT * FROM {schema}.{table}")
+            self.cursor.execute(f"DELETE FROM {schema}.{table} WHERE ({columns}) IN %s", (tuple(map(tuple, keys)),))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return self.cursor.rowcount
+
+    def install_change_log(self, schema: str, table: str, key_columns: list[str]):
+        log_table = f"_cdc_{table}"
+        key_json = ', '.join(f"'{k}', OLD.\"{k}\"" for k in key_columns)
+        self.cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {schema}.{log_table} (
+                id BIGSERIAL PRIMARY KEY,
+                op CHAR(1) NOT NULL,
+                row_data JSONB NOT NULL
+            )
+        """)
+        self.cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {schema}.{log_table}_fn() RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'DELETE' THEN
+                    INSERT INTO {schema}.{log_table} (op, row_data) VALUES ('D', jsonb_build_object({key_json}));
+                ELSE
+                    INSERT INTO {schema}.{log_table} (op, row_data) VALUES (left(TG_OP, 1), to_jsonb(NEW));
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        self.cursor.execute(f"DROP TRIGGER IF EXISTS {log_table}_trg ON {schema}.{table}")
+        self.cursor.execute(f"""
+            CREATE TRIGGER {log_table}_trg AFTER INSERT OR UPDATE OR DELETE ON {schema}.{table}
+            FOR EACH ROW EXECUTE FUNCTION {schema}.{log_table}_fn()
+        """)
+        self.conn.commit()
+
+    def read_change_log(self, schema: str, table: str, limit: int) -> list[tuple]:
+        # Tidak memakai "id > terakhir": nilai BIGSERIAL bisa commit tidak berurutan, baris yang
+        # commit terlambat tetap terbaca karena hanya id yang sudah diterapkan yang dihapus
+        self.cursor.execute(f"SELECT id, op, row_data FROM {schema}._cdc_{table} ORDER BY id LIMIT %s", (limit,))
+        return self.cursor.fetchall()
+
+    def purge_change_log(self, schema: str, table: str, ids: list[int]):
+        if not ids:
+            return
+        self.cursor.execute(f"DELETE FROM {schema}._cdc_{table} WHERE id = ANY(%s)", (list(ids),))
+        self.conn.commit()
+
+    def capture_indexes(self, schema: str, table: str) -> dict:
+        # Index sekunder non-unique saja; index UNIQUE (termasuk yang berdiri sendiri tanpa
+        # constraint) tetap ada karena dibutuhkan ON CONFLICT dan mencegah duplikat selama load
+        self.cursor.execute("""
+            SELECT c.relname, pg_get_indexdef(i.indexrelid)
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE i.indrelid = %s::regclass
+              AND NOT i.indisunique AND NOT i.indisprimary
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint con WHERE con.conindid = i.indexrelid)
+        """, (f"{schema}.{table}",))
+        indexes = self.cursor.fetchall()
+        self.cursor.execute("""
+            SELECT conname, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype = 'f'
+        """, (f"{schema}.{table}",))
+        foreign_keys = self.cursor.fetchall()
+        return {"indexes": indexes, "foreign_keys": foreign_keys, "unlogged": False}
+
+    def drop_indexes(self, schema: str, table: str, state: dict, unlogged: bool = False):
+        for name, _ in state["foreign_keys"]:
+            self.cursor.execute(f'ALTER TABLE {schema}.{table} DROP CONSTRAINT "{name}"')
+        for name, _ in state["indexes"]:
+            self.cursor.execute(f'DROP INDEX IF EXISTS {schema}."{name}"')
+        if unlogged:
+            try:
+                # Tanpa WAL selama load; tabel dibuat LOGGED lagi saat restore
+                self.cursor.execute(f"ALTER TABLE {schema}.{table} SET UNLOGGED")
+                state["unlogged"] = True
+            except Exception as e:
+                print("⚠️ Tidak bisa mengubah tabel menjadi UNLOGGED:", e)
+        self.conn.commit()
+
+    def _run_on_new_connection(self, query: str):
+        conn = psycopg2.connect(**self.conn_params)
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(query)
+        finally:
+            conn.close()
+
+    def restore_indexes(self, schema: str, table: str, state: dict) -> list:
+        failed = []
+        if state.get("unlogged"):
+            try:
+                self.cursor.execute(f"ALTER TABLE {schema}.{table} SET LOGGED")
+            except Exception as e:
+                failed.append((f"ALTER TABLE {schema}.{table} SET LOGGED", e))
+
+        # Setiap index dibangun paralel di koneksi terpisah
+        workers = max(1, min(len(state["indexes"]), int(os.getenv("POSTGRESQL_INDEX_WORKERS", 4))))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self._run_on_new_connection, ddl): ddl for _, ddl in state["indexes"]}
+            for future, ddl in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    failed.append((ddl, e))
+
+        for name, definition in state["foreign_keys"]:
+            ddl = f'ALTER TABLE {schema}.{table} ADD CONSTRAINT "{name}" {definition}'
+            try:
+                self.cursor.execute(ddl)
+            except Exception as e:
+                failed.append((ddl, e))
+
+        for ddl, e in failed:
+            print(f"❌ Gagal memulihkan: {ddl}\n   {e}")
+        return failed
+
+    def read_data(self, schema: str, table: str, row_filter: RowFilter = None):
+        try:
+            query, params = sql_query(f"{schema}.{table}", row_filter, _quote)
+            self.cursor.execute(query, params)
             rows = self.cursor.fetchall()
             return rows
         except Exception as e:
             print("❌ Error:", e)
             return []
 
+    def iter_batches(self, schema: str, table: str, batch_size: int = 1000, since: tuple = None,
+                     row_filter: RowFilter = None):
+        # Named cursor = server-side cursor. Cursor WITH HOLD dimaterialisasi seluruhnya saat
+        # commit, jadi streaming memakai koneksi sendiri tanpa autocommit (satu transaksi baca)
+        conn = psycopg2.connect(**self.conn_params)
+        cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex}")
+        cursor.itersize = batch_size
+        query, params = sql_query(f"{schema}.{table}", row_filter, _quote, since)
+        try:
+            cursor.execute(query, params)
+            columns = None
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                columns = columns or [desc[0] for desc in cursor.description]
+                yield RowBatch.from_tuples(columns, rows)
+        finally:
+            cursor.close()
+            conn.rollback()
+            conn.close()
+
+    def freshness_token(self, schema: str, table: str, watermark: str = None) -> dict:
+        # reltuples = estimasi jumlah baris, n_tup_* = penghitung perubahan sejak statistik direset
+        self.cursor.execute("""
+            SELECT c.reltuples::bigint, s.n_tup_ins + s.n_tup_upd + s.n_tup_del
+            FROM pg_class c
+            LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+            WHERE c.oid = %s::regclass
+        """, (f"{schema}.{table}",))
+        rows, changes = self.cursor.fetchone()
+        token = {"rows": rows, "changes": changes}
+        if watermark:
+            self.cursor.execute(f'SELECT MAX("{watermark}") FROM {schema}.{table}')
+            token["watermark"] = self.cursor.fetchone()[0]
+        return token
+
+    def load_signal(self) -> float:
+        # Lag replika terbesar; tanpa replika nilainya 0
+        self.cursor.execute("SELECT COALESCE(MAX(EXTRACT(EPOCH FROM replay_lag)), 0) FROM pg_stat_replication")
+        return float(self.cursor.fetchone()[0]) / self.max_replication_lag
+
     def update_data(self, schema: str, table: str, row_id: int, column: str, new_value: str):
         try:
             query = f"UPDATE {schema}.{table} SET {column} = %s WHERE id = %s"
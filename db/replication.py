@@ -0,0 +1,286 @@
+# Replikasi berkelanjutan (CDC): baca perubahan dari source, terapkan ke target per micro-batch
+import json
+import os
+import select
+import time
+
+from rich.console import Console
+
+from utils import ndjson
+from utils.batching import batch_bytes
+
+console = Console()
+
+CDC_STATE_DIR = os.getenv("CDC_STATE_DIR", ".cdc_state")
+INSERT, UPDATE, DELETE = "I", "U", "D"
+
+
+class ReplicationState:
+    """Posisi baca terakhir (resume token / LSN / binlog / id change-log) yang sudah diterapkan."""
+
+    def __init__(self, name: str):
+        self.path = os.path.join(CDC_STATE_DIR, f"{name}.json")
+        self.position = {}
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                self.position = ndjson.loads(f.read())
+
+    def save(self, position: dict):
+        os.makedirs(CDC_STATE_DIR, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(ndjson.dumps(position))
+        os.replace(tmp, self.path)  # atomic, file state tidak pernah setengah tertulis
+        self.position = position
+
+
+def coalesce(changes: list[tuple], key_columns: list[str]) -> dict:
+    """Gabungkan beberapa perubahan pada key yang sama; hanya perubahan terakhir yang diterapkan."""
+    latest = {}
+    for op, row in changes:
+        key = tuple(row.get(k) for k in key_columns)
+        latest.pop(key, None)  # pindahkan ke akhir supaya urutan tetap sesuai perubahan terakhir
+        latest[key] = (op, row)
+    return latest
+
+
+def apply_changes(target, schema: str, table: str, latest: dict, key_columns: list[str]) -> tuple[int, int]:
+    upserts = [row for op, row in latest.values() if op != DELETE]
+    deletes = [key for key, (op, _) in latest.items() if op == DELETE]
+    if upserts:
+        target.upsert_many(schema, table, upserts, key_columns)
+    if deletes:
+        target.delete_many(schema, table, key_columns, deletes)
+    return len(upserts), len(deletes)
+
+
+class MongoChangeStreamSource:
+    def __init__(self, handler, schema: str, table: str, position: dict):
+        self.collection = handler.client[schema][table]
+        self.stream = self.collection.watch(
+            full_document="updateLookup",
+            resume_after=position.get("resume_token"),
+        )
+
+    def poll(self, max_items: int, timeout: float) -> list[tuple]:
+        changes = []
+        deadline = time.monotonic() + timeout
+        while len(changes) < max_items and time.monotonic() < deadline:
+            change = self.stream.try_next()
+            if change is None:
+                time.sleep(0.05)
+                continue
+            op = change["operationType"]
+            if op in ("insert", "update", "replace"):
+                row = change.get("fullDocument")
+                if row is None:  # dokumen sudah dihapus sebelum lookup
+                    row, op = change["documentKey"], "delete"
+                changes.append((DELETE if op == "delete" else UPDATE, row))
+            elif op == "delete":
+                changes.append((DELETE, change["documentKey"]))
+        return changes
+
+    def position(self) -> dict:
+        return {"resume_token": self.stream.resume_token}
+
+    def ack(self):
+        pass
+
+
+class PostgresLogicalSource:
+    """Logical decoding dengan plugin wal2json (format-version 2) lewat koneksi replikasi psycopg2."""
+
+    def __init__(self, handler, schema: str, table: str, position: dict, slot: str):
+        import psycopg2
+        from psycopg2.extras import LogicalReplicationConnection
+
+        self.conn = psycopg2.connect(connection_factory=LogicalReplicationConnection, **handler.conn_params)
+        self.cursor = self.conn.cursor()
+        handler.cursor.execute("SELECT 1 FROM pg_replication_slots WHERE slot_name = %s", (slot,))
+        if handler.cursor.fetchone() is None:
+            # Slot menahan WAL sampai dikonfirmasi lewat send_feedback, jadi tidak ada perubahan yang hilang
+            self.cursor.create_replication_slot(slot, output_plugin="wal2json")
+        self.cursor.start_replication(
+            slot_name=slot,
+            decode=True,
+            start_lsn=position.get("lsn", 0),
+            options={"format-version": "2", "add-tables": f"{schema}.{table}"},
+        )
+        self.lsn = position.get("lsn", 0)
+
+    def poll(self, max_items: int, timeout: float) -> list[tuple]:
+        changes = []
+        deadline = time.monotonic() + timeout
+        while len(changes) < max_items:
+            message = self.cursor.read_message()
+            if message is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                select.select([self.cursor], [], [], remaining)
+                continue
+            self.lsn = message.data_start
+            change = json.loads(message.payload)
+            action = change.get("action")
+            if action in (INSERT, UPDATE):
+                changes.append((action, {c["name"]: c["value"] for c in change["columns"]}))
+            elif action == DELETE:
+                changes.append((DELETE, {c["name"]: c["value"] for c in change["identity"]}))
+        return changes
+
+    def position(self) -> dict:
+        return {"lsn": self.lsn}
+
+    def ack(self):
+        # Beri tahu server bahwa WAL sampai LSN ini boleh dibuang
+        self.cursor.send_feedback(flush_lsn=self.lsn)
+
+
+class MySQLBinlogSource:
+    """Membaca binlog berformat ROW lewat paket opsional mysql-replication."""
+
+    def __init__(self, handler, schema: str, table: str, position: dict):
+        try:
+            from pymysqlreplication.row_event import DeleteRowsEvent, UpdateRowsEvent, WriteRowsEvent
+        except ImportError:
+            raise RuntimeError("Binlog MySQL butuh paket 'mysql-replication', atau gunakan --method trigger.")
+
+        self.event_types = (WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent)
+        self.write_event, self.update_event = WriteRowsEvent, UpdateRowsEvent
+        self.reader_args = dict(
+            connection_settings=handler.conn_params,
+            server_id=int(os.getenv("CDC_MYSQL_SERVER_ID", 4379)),
+            only_schemas=[schema],
+            only_tables=[table],
+            only_events=list(self.event_types),
+            resume_stream=True,
+            blocking=False,
+        )
+        self.log_file = position.get("log_file")
+        self.log_pos = position.get("log_pos")
+        self.stream = None
+
+    def poll(self, max_items: int, timeout: float) -> list[tuple]:
+        from pymysqlreplication import BinLogStreamReader
+
+        changes = []
+        deadline = time.monotonic() + timeout
+        while len(changes) < max_items and time.monotonic() < deadline:
+            if self.stream is None:
+                self.stream = BinLogStreamReader(log_file=self.log_file, log_pos=self.log_pos, **self.reader_args)
+            event = self.stream.fetchone()
+            if event is None:
+                # Non-blocking: stream habis, buka lagi dari posisi terakhir setelah jeda
+                if self.stream.log_file:
+                    self.log_file, self.log_pos = self.stream.log_file, self.stream.log_pos
+                self.stream.close()
+                self.stream = None
+                time.sleep(0.2)
+                continue
+            for row in event.rows:
+                if isinstance(event, self.write_event):
+                    changes.append((INSERT, row["values"]))
+                elif isinstance(event, self.update_event):
+                    changes.append((UPDATE, row["after_values"]))
+                else:
+                    changes.append((DELETE, row["values"]))
+            self.log_file, self.log_pos = self.stream.log_file, self.stream.log_pos
+        return changes
+
+    def position(self) -> dict:
+        return {"log_file": self.log_file, "log_pos": self.log_pos}
+
+    def ack(self):
+        pass
+
+
+class TriggerChangeLogSource:
+    """Fallback portabel: trigger menulis setiap perubahan ke tabel _cdc_<tabel>.
+
+    Tabel change-log dipakai sebagai antrean: setiap poll membaca entri tertua yang masih ada,
+    dan ack() hanya menghapus id yang benar-benar sudah diterapkan. Entri dari transaksi yang
+    commit terlambat (id lebih kecil dari yang sudah dibaca) tetap terbaca di poll berikutnya.
+    """
+
+    def __init__(self, handler, schema: str, table: str, position: dict, key_columns: list[str]):
+        self.handler, self.schema, self.table = handler, schema, table
+        handler.install_change_log(schema, table, key_columns)
+        self.last_id = position.get("last_id", 0)
+        self.pending_ids = []
+
+    def poll(self, max_items: int, timeout: float) -> list[tuple]:
+        deadline = time.monotonic() + timeout
+        while True:
+            entries = self.handler.read_change_log(self.schema, self.table, max_items)
+            if entries or time.monotonic() >= deadline:
+                break
+            time.sleep(min(0.5, max(0.0, deadline - time.monotonic())))
+        self.pending_ids = [id_ for id_, _, _ in entries]
+        if entries:
+            self.last_id = max(self.last_id, max(self.pending_ids))
+        return [(op, row) for _, op, row in entries]
+
+    def position(self) -> dict:
+        # Hanya informasi; entri yang belum di-ack tetap ada di change-log dan dibaca ulang
+        return {"last_id": self.last_id}
+
+    def ack(self):
+        if self.pending_ids:
+            self.handler.purge_change_log(self.schema, self.table, self.pending_ids)
+            self.pending_ids = []
+
+
+def open_source(source_db: str, handler, schema: str, table: str, position: dict,
+                key_columns: list[str], method: str = "auto", slot: str = None):
+    if method == "trigger":
+        return TriggerChangeLogSource(handler, schema, table, position, key_columns)
+    if source_db == "mongo":
+        return MongoChangeStreamSource(handler, schema, table, position)
+    if source_db == "postgres":
+        return PostgresLogicalSource(handler, schema, table, position, slot or f"cdc_{schema}_{table}")
+    if source_db == "mysql":
+        try:
+            return MySQLBinlogSource(handler, schema, table, position)
+        except RuntimeError as e:
+            if method == "native":
+                raise
+            console.print(f"[yellow]⚠️ {e} Beralih ke change-log trigger.[/yellow]")
+            return TriggerChangeLogSource(handler, schema, table, position, key_columns)
+    raise ValueError(f"CDC belum didukung untuk source '{source_db}'.")
+
+
+def stream_changes(source, target, schema: str, table: str, key_columns: list[str],
+                   state: ReplicationState, batch_size: int = 1000, flush_seconds: float = 1.0,
+                   governor=None):
+    """Loop utama: poll -> coalesce -> apply -> simpan posisi. Berhenti dengan Ctrl+C.
+
+    governor (utils.governor.Governor) opsional menahan laju penerapan ke target.
+    """
+    applied = 0
+    try:
+        while True:
+            changes = source.poll(batch_size, flush_seconds)
+            if not changes:
+                continue
+            latest = coalesce(changes, key_columns)
+            if governor is None:
+                upserted, deleted = apply_changes(target, schema, table, latest, key_columns)
+            else:
+                governor.throttle(len(latest), batch_bytes([row for _, row in latest.values()]))
+                started = time.perf_counter()
+                try:
+                    upserted, deleted = apply_changes(target, schema, table, latest, key_columns)
+                except Exception as e:
+                    governor.record_error(e)
+                    raise
+                governor.observe(time.perf_counter() - started)
+            # Posisi hanya disimpan setelah perubahan benar-benar diterapkan di target
+            state.save(source.position())
+            source.ack()
+            applied += len(changes)
+            console.print(
+                f"[green]🔁 {len(changes)} perubahan → {upserted} upsert, {deleted} delete "
+                f"(total {applied})[/green]"
+            )
+    except KeyboardInterrupt:
+        console.print(f"[yellow]⏹️ Replikasi dihentikan. Posisi tersimpan di {state.path}[/yellow]")
@@ -0,0 +1,140 @@
+# Representasi batch baris berbasis kolom yang dipakai bersama oleh semua handler
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsional
+    np = None
+
+INT64_MIN, INT64_MAX = -(2 ** 63), 2 ** 63 - 1
+
+
+def _pack(values: list):
+    """Kolom numerik tanpa NULL disimpan sebagai array bertipe, selain itu tetap list."""
+    if not values:
+        return values
+    first = type(values[0])
+    if first is int and all(type(v) is int for v in values):
+        if INT64_MIN <= min(values) and max(values) <= INT64_MAX:
+            return array("q", values)
+    elif first is float and all(type(v) is float for v in values):
+        return array("d", values)
+    return values
+
+
+class RowBatch:
+    """Satu header kolom + satu array per kolom; tidak ada dict per baris.
+
+    missing mencatat sel yang hanya berisi None pengisi karena field-nya tidak ada di dokumen
+    asal ({kolom: set(index baris)}), supaya dokumen bisa dibentuk ulang tanpa field tersebut.
+    """
+
+    __slots__ = ("columns", "arrays", "missing")
+
+    def __init__(self, columns: list[str], arrays: list, missing: dict = None):
+        self.columns = list(columns)
+        self.arrays = arrays
+        self.missing = missing or {}
+
+    @classmethod
+    def from_tuples(cls, columns: list[str], rows: list) -> "RowBatch":
+        # zip(*rows) mentranspos baris menjadi kolom di level C
+        arrays = [_pack(list(col)) for col in zip(*rows)] if rows else [[] for _ in columns]
+        return cls(columns, arrays)
+
+    @classmethod
+    def from_dicts(cls, rows: list[dict]) -> "RowBatch":
+        # Dokumen (Mongo) bisa punya field berbeda-beda: header = gabungan semua key
+        columns = list(dict.fromkeys(key for row in rows for key in row))
+        arrays, missing = [], {}
+        for col in columns:
+            values = [row.get(col) for row in rows]
+            absent = {i for i, row in enumerate(rows) if col not in row} if None in values else None
+            if absent:
+                missing[col] = absent
+            arrays.append(_pack(values))
+        return cls(columns, arrays, missing)
+
+    @classmethod
+    def concat(cls, batches: list["RowBatch"]) -> "RowBatch":
+        if len(batches) == 1:
+            return batches[0]
+        columns = list(dict.fromkeys(col for batch in batches for col in batch.columns))
+        arrays, missing = [], {}
+        for name in columns:
+            values, absent = [], set()
+            for batch in batches:
+                offset = len(values)
+                if name in batch.columns:
+                    values.extend(batch.column(name))
+                    absent.update(offset + i for i in batch.missing.get(name, ()))
+                else:
+                    values.extend([None] * len(batch))
+                    absent.update(range(offset, len(values)))
+            arrays.append(_pack(values))
+            if absent:
+                missing[name] = absent
+        return cls(columns, arrays, missing)
+
+    def __len__(self) -> int:
+        return len(self.arrays[0]) if self.arrays else 0
+
+    def __getitem__(self, index: slice) -> "RowBatch":
+        missing = {}
+        if self.missing:
+            start, stop, _ = index.indices(len(self))
+            for name, absent in self.missing.items():
+                kept = {i - start for i in absent if start <= i < stop}
+                if kept:
+                    missing[name] = kept
+        return RowBatch(self.columns, [col[index] for col in self.arrays], missing)
+
+    def rows(self):
+        """Iterator tuple per baris, urut sesuai columns."""
+        return zip(*self.arrays)
+
+    def to_dicts(self) -> list[dict]:
+        columns = self.columns
+        return [dict(zip(columns, row)) for row in zip(*self.arrays)]
+
+    def to_documents(self) -> list[dict]:
+        """Seperti to_dicts(), tapi field yang tidak ada di dokumen asal tidak ikut (None asli tetap)."""
+        docs = self.to_dicts()
+        for name, absent in self.missing.items():
+            for i in absent:
+                del docs[i][name]
+        return docs
+
+    def column(self, name: str):
+        return self.arrays[self.columns.index(name)]
+
+    def select(self, columns: list[str]) -> "RowBatch":
+        """Proyeksi ke urutan kolom tertentu; kolom yang tidak ada diisi None."""
+        missing = {name: self.missing[name] for name in columns if name in self.missing}
+        missing.update({name: set(range(len(self))) for name in columns if name not in self.columns})
+        return RowBatch(columns, [self.column(name) if name in self.columns else [None] * len(self)
+                                  for name in columns], missing)
+
+    def to_numpy(self, name: str):
+        """Kolom bertipe sebagai numpy array tanpa salin (butuh numpy)."""
+        if np is None:
+            raise RuntimeError("numpy belum terpasang.")
+        col = self.column(name)
+        if isinstance(col, array):
+            return np.frombuffer(col, dtype=np.int64 if col.typecode == "q" else np.float64)
+        return np.asarray(col, dtype=object)
+
+    def nbytes(self) -> int:
+        # Perkiraan ukuran payload, dipakai batch sizer
+        total = 0
+        for name, col in zip(self.columns, self.arrays):
+            if isinstance(col, array):
+                total += col.itemsize * len(col)
+            else:
+                total += sum(len(str(v)) for v in col)
+            total += len(name)
+        return total
+
+
+def as_rowbatch(rows) -> RowBatch:
+    return rows if isinstance(rows, RowBatch) else RowBatch.from_dicts(rows)
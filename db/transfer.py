@@ -1,8 +1,14 @@
 # db_transfer.py
 from getpass import getpass
 import importlib
-from rich.prompt import Prompt
+import itertools
+from rich.prompt import Prompt, Confirm
 from rich.console import Console
+from db.fastpath import FastPathError, get_fast_path
+from utils.bulkload import deferred_indexes
+from utils.batching import AdaptiveBatchSizer, write_batches
+from utils.governor import build_governor, governed
+from utils.filters import column_definitions, parse_filter, project_structure
 
 console = Console()
 
@@ -20,9 +26,17 @@ def prompt_db_config(role):
         "password": password
     }
 
+# db_type dari prompt -> (modul, kelas handler)
+HANDLER_CLASSES = {
+    "mysql": ("db.mysql", "MySQLDB"),
+    "postgres": ("db.postgresql", "PostgreSQLDB"),
+    "mongodb": ("db.mongodb", "MongoDB"),
+    "cassandra": ("db.cassandra", "CassandraDB"),
+}
+
 def get_handler_from_config(config):
-    module = importlib.import_module(f"db.{config['db_type']}")
-    handler_class = getattr(module, f"{config['db_type'].capitalize()}DB")
+    module_name, class_name = HANDLER_CLASSES[config["db_type"]]
+    handler_class = getattr(importlib.import_module(module_name), class_name)
     return handler_class(config)
 
 def interactive_transfer():
@@ -38,14 +52,45 @@ def interactive_transfer():
     target_schema = Prompt.ask("[yellow]Target schema/database name[/yellow]", default=source_schema)
     target_table = Prompt.ask("[yellow]Target table/collection name[/yellow]", default=source_table)
 
+    # Filter & kolom didorong ke source, hanya data yang diminta yang lewat jaringan
+    where = Prompt.ask("[yellow]Filter baris, contoh: umur >= 18 AND kota = 'Bandung' (kosong = semua)[/yellow]", default="")
+    select_columns = Prompt.ask("[yellow]Kolom yang disalin, pisahkan dengan koma (kosong = semua)[/yellow]", default="")
+    allow_filtering = False
+    if where and source_config["db_type"] == "cassandra":
+        allow_filtering = Confirm.ask("[yellow]Izinkan ALLOW FILTERING di Cassandra?[/yellow]", default=False)
+
+    # Mode upsert membuat transfer aman dijalankan ulang ke tabel yang sudah berisi
+    upsert = Confirm.ask("[yellow]Gunakan mode upsert (timpa data dengan key yang sama)?[/yellow]", default=False)
+    key_columns = None
+    if upsert:
+        key = Prompt.ask("[yellow]Kolom key, pisahkan dengan koma (kosong = PRIMARY KEY)[/yellow]", default="")
+        key_columns = [k.strip() for k in key.split(",")] if key else None
+
+    defer_indexes = Confirm.ask("[yellow]Lepas index & constraint target selama load (dibangun ulang di akhir)?[/yellow]", default=False)
+
+    # Governor: batasi laju supaya database produksi tidak terganggu
+    rows_per_sec = Prompt.ask("[yellow]Batas baris per detik (kosong = tanpa batas)[/yellow]", default="")
+    rows_per_sec = float(rows_per_sec) if rows_per_sec else None
+    protect = Confirm.ask("[yellow]Mundur otomatis saat source/target sibuk (lag replika, Threads_running, timeout)?[/yellow]", default=False)
+
     # Create handler for source and target
     source_handler = get_handler_from_config(source_config)
     target_handler = get_handler_from_config(target_config)
 
-    # Baca data dari source
-    data = source_handler.read_data(source_schema, source_table)
-    if not data:
-        console.print("❌ Tidak ada data untuk ditransfer.", style="bold red")
+    # Target MongoDB tanpa kolom key: cocokkan lewat PRIMARY KEY source, karena default _id
+    # tidak ada di baris SQL dan setiap upsert akan menjadi dokumen baru
+    if upsert and not key_columns and target_config["db_type"] == "mongodb":
+        key_columns = source_handler.primary_key(source_schema, source_table) or None
+        if not key_columns:
+            console.print("❌ Source tidak punya PRIMARY KEY, isi kolom key untuk upsert ke MongoDB.", style="bold red")
+            return
+
+    # Ambil struktur kolom dari source
+    structure = source_handler.describe_table(source_schema, source_table)
+    try:
+        row_filter = parse_filter(where, select_columns, structure, allow_filtering)
+    except ValueError as e:
+        console.print(f"❌ {e}", style="bold red")
         return
 
     # Cek dan buat schema/tabel jika belum ada
@@ -55,19 +100,53 @@ def interactive_transfer():
         pass  # Jika DB seperti MongoDB tidak punya konsep schema
 
     try:
-        # Ambil struktur kolom dari source
-        columns = source_handler.describe_table(source_schema, source_table)
+        columns = project_structure(structure, row_filter)
         if columns:
-            target_handler.create_table(target_schema, target_table, columns)
+            target_handler.create_table(target_schema, target_table, column_definitions(columns))
     except Exception as e:
         console.print(f"[red]❗ Gagal membuat tabel: {e}[/red]")
 
-    # Masukkan data ke target
-    for row in data:
-        try:
-            row_dict = row if isinstance(row, dict) else dict(row)
-            target_handler.insert_data(target_schema, target_table, row_dict)
-        except Exception as e:
-            console.print(f"[red]❗ Gagal insert data: {e}[/red]")
+    source_governor = build_governor("source", source_handler, rows_per_sec, protect=protect)
+    target_governor = build_governor("target", target_handler, rows_per_sec, protect=protect)
+
+    # Engine sama: salin tanpa decode (COPY binary / raw BSON / INSERT multi-row).
+    # Jalur cepat menyalin seluruh tabel dan tidak bisa ditahan per batch, jadi tidak dipakai
+    # saat ada filter/proyeksi kolom atau governor aktif.
+    fast_copy = None
+    if not upsert and row_filter is None and source_governor is None and target_governor is None:
+        fast_copy = get_fast_path(source_config["db_type"], target_config["db_type"])
+
+    with deferred_indexes(target_handler, target_schema, target_table, enabled=defer_indexes):
+        if fast_copy:
+            try:
+                success = total = fast_copy(source_handler, target_handler, source_schema, source_table,
+                                            target_schema, target_table)
+                console.print(f"[cyan]⚡ Jalur cepat {source_config['db_type']} → {target_config['db_type']} dipakai.[/cyan]")
+            except FastPathError as e:
+                if e.written:
+                    # Jalur umum akan menyalin ulang dari awal dan menggandakan baris yang sudah masuk
+                    console.print(f"[red]❌ Jalur cepat gagal setelah ±{e.written} baris ditulis ({e}). "
+                                  "Kosongkan tabel target lalu ulangi, atau gunakan mode upsert.[/red]")
+                    return
+                console.print(f"[yellow]⚠️ Jalur cepat gagal ({e}), memakai jalur umum.[/yellow]")
+                fast_copy = None
+
+        if not fast_copy:
+            # Baca data dari source per batch
+            batches = governed(
+                source_handler.iter_batches(source_schema, source_table, row_filter=row_filter), source_governor
+            )
+            first = next(batches, None)
+            if not first:
+                console.print("❌ Tidak ada data untuk ditransfer.", style="bold red")
+                return
+
+            # Masukkan data ke target per batch, ukuran batch disesuaikan otomatis
+            rows = itertools.chain([first], batches)
+            sizer = AdaptiveBatchSizer(max_bytes=getattr(target_handler, "max_batch_bytes", None))
+            success, total = write_batches(
+                target_handler, target_schema, target_table, rows, sizer, upsert=upsert, key_columns=key_columns,
+                governor=target_governor,
+            )
 
-    console.print(f"[green]✅ Transfer selesai. {len(data)} data berhasil ditransfer.[/green]")
+    console.print(f"[green]✅ Transfer selesai. {success} dari {total} data berhasil ditransfer.[/green]")
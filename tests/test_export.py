@@ -0,0 +1,47 @@
+import io
+from decimal import Decimal
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+from utils.export import write_parquet
+
+
+def read_back(stream):
+    stream.seek(0)
+    return pq.read_table(stream)
+
+
+def test_parquet_decimal_schema_comes_from_table_structure():
+    batches = [[{"harga": Decimal("5.5")}], [{"harga": Decimal("12345.25")}]]
+    stream = io.BytesIO()
+
+    assert write_parquet(stream, batches, {"harga": "decimal(10,2)"}) == 2
+
+    table = read_back(stream)
+    assert table.schema.field("harga").type == pa.decimal128(10, 2)
+    assert table.column("harga").to_pylist() == [Decimal("5.50"), Decimal("12345.25")]
+
+
+def test_parquet_column_null_in_first_batch_keeps_declared_type():
+    batches = [[{"id": 1, "catatan": None}], [{"id": 2, "catatan": "ada"}]]
+    stream = io.BytesIO()
+
+    write_parquet(stream, batches, {"id": "int", "catatan": "varchar(20)"})
+
+    table = read_back(stream)
+    assert table.schema.field("catatan").type == pa.string()
+    assert table.column("catatan").to_pylist() == [None, "ada"]
+
+
+def test_parquet_object_id_is_written_as_text():
+    ObjectId = pytest.importorskip("bson").ObjectId
+    ids = [ObjectId(), ObjectId()]
+    batches = [[{"_id": ids[0], "nama": "a"}], [{"_id": ids[1], "nama": "b"}]]
+    stream = io.BytesIO()
+
+    write_parquet(stream, batches, {"_id": "ObjectId", "nama": "str"})
+
+    assert read_back(stream).column("_id").to_pylist() == [str(i) for i in ids]
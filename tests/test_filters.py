@@ -0,0 +1,50 @@
+import pytest
+
+from utils.filters import _split_outside_quotes, parse_filter, parse_where
+
+STRUCTURE = [{"Column": "nama"}, {"Column": "umur"}, {"Column": "kota"}]
+
+
+def test_split_ignores_separator_inside_quotes():
+    text = "nama = 'Tom AND Jerry' AND umur > 1"
+    assert _split_outside_quotes(text, r"\s+AND\s+") == ["nama = 'Tom AND Jerry'", "umur > 1"]
+
+
+def test_split_treats_other_quote_as_plain_character():
+    text = "nama = \"O'Brien\" AND kota = 'Bandung'"
+    assert _split_outside_quotes(text, r"\s+AND\s+") == ["nama = \"O'Brien\"", "kota = 'Bandung'"]
+
+
+def test_parse_where_literals():
+    predicates = parse_where("nama = \"O'Brien\" AND umur >= 18 AND kota IN ('Bandung', 'it''s') AND aktif = true")
+    assert predicates == [
+        ("nama", "=", "O'Brien"),
+        ("umur", ">=", 18),
+        ("kota", "IN", ["Bandung", "it's"]),
+        ("aktif", "=", True),
+    ]
+
+
+def test_parse_where_accepts_single_bare_word():
+    assert parse_where("kota = Bandung") == [("kota", "=", "Bandung")]
+
+
+@pytest.mark.parametrize("where", [
+    "umur = 1 OR 1=1",
+    "umur >= 18 AND",
+    "kota = Bandung Barat",
+    "umur = NULL",
+])
+def test_parse_where_rejects_unquoted_expressions(where):
+    with pytest.raises(ValueError):
+        parse_where(where)
+
+
+def test_search_column_is_validated():
+    row_filter = parse_filter("umur > 1", None, STRUCTURE, search=("kota", "ban"))
+    assert row_filter.predicates[-1] == ("kota", "LIKE", "%ban%")
+
+    with pytest.raises(ValueError, match="tidak dikenal"):
+        parse_filter("umur > 1", None, STRUCTURE, search=("alamat", "x"))
+    with pytest.raises(ValueError, match="tidak valid"):
+        parse_filter("umur > 1", None, STRUCTURE, search=("kota = 1 OR 1", "x"))
@@ -0,0 +1,33 @@
+from decimal import Decimal
+
+from utils import snapshot as snapshots
+from utils.filters import parse_filter
+
+
+class FakeHandler:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def freshness_token(self, schema, table, watermark=None):
+        return {"rows": len(self.rows)}
+
+    def primary_key(self, schema, table):
+        return ["id"]
+
+    def iter_batches(self, schema, table, batch_size, since=None):
+        yield self.rows
+
+
+def test_snapshot_keeps_decimal_text_and_compares_numerically(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, "SNAPSHOT_DIR", str(tmp_path))
+    handler = FakeHandler([{"id": 1, "harga": Decimal("5.00")}, {"id": 2, "harga": Decimal("12.50")}])
+    snapshots.refresh_snapshot(handler, "mysql", "toko", "produk")
+
+    snapshot = snapshots.Snapshot(snapshots.snapshot_path("mysql", "toko", "produk"))
+    try:
+        assert snapshot.read_rows() == [(1, "5.00"), (2, "12.50")]
+        structure = [{"Column": "id"}, {"Column": "harga"}]
+        assert snapshot.read_rows(parse_filter("harga > 10", None, structure)) == [(2, "12.50")]
+        assert snapshot.read_rows(parse_filter("harga = 5", None, structure)) == [(1, "5.00")]
+    finally:
+        snapshot.close()
@@ -0,0 +1,127 @@
+import pytest
+
+pytest.importorskip("rich")
+
+from db import transfer
+from db.base import DatabaseHandler
+from db.rowbatch import RowBatch
+
+
+class FakeConnection:
+    def __init__(self, **params):
+        self.params = params
+        self.autocommit = False
+
+    def cursor(self, *args, **kwargs):
+        return None
+
+
+class FakeCluster:
+    def __init__(self, contact_points, port):
+        self.contact_points, self.port = contact_points, port
+
+    def connect(self):
+        return None
+
+
+@pytest.mark.parametrize("db_type, module_name, driver, class_name", [
+    ("mysql", "db.mysql", "pymysql.connect", "MySQLDB"),
+    ("postgres", "db.postgresql", "psycopg2.connect", "PostgreSQLDB"),
+    ("mongodb", "db.mongodb", "MongoClient", "MongoDB"),
+    ("cassandra", "db.cassandra", "Cluster", "CassandraDB"),
+])
+def test_get_handler_from_config_uses_prompted_connection(monkeypatch, db_type, module_name, driver, class_name):
+    module = pytest.importorskip(module_name)
+    if db_type == "cassandra":
+        monkeypatch.setattr(module, "Cluster", FakeCluster)
+    else:
+        monkeypatch.setattr(f"{module_name}.{driver}", FakeConnection)
+
+    config = {"db_type": db_type, "host": "db.example", "port": 4321, "user": "u", "password": "p"}
+    handler = transfer.get_handler_from_config(config)
+
+    assert type(handler).__name__ == class_name
+    if db_type in ("mysql", "postgres"):
+        assert handler.conn.params["host"] == "db.example"
+        assert handler.conn.params["port"] == 4321
+    elif db_type == "mongodb":
+        assert handler.client.params["host"] == "db.example"
+    else:
+        assert handler.cluster.contact_points == ["db.example"]
+
+
+class FakeSource(DatabaseHandler):
+    def create_schema(self, name): pass
+    def read_schemas(self): return []
+    def delete_schema(self, name): pass
+    def create_table(self, schema, table_name, columns): pass
+
+    def describe_table(self, schema, table):
+        return [{"Column": "id", "Type": "int"}, {"Column": "name", "Type": "varchar(10)"}]
+
+    def iter_batches(self, schema, table, batch_size=1000, since=None, row_filter=None):
+        for start in range(0, 1200, 300):
+            yield RowBatch.from_tuples(["id", "name"], [(i, f"n{i}") for i in range(start, start + 300)])
+
+
+class FakeTarget(FakeSource):
+    def __init__(self):
+        self.batches = []
+
+    def insert_many(self, schema, table, rows):
+        self.batches.append(len(rows))
+        return len(rows)
+
+
+def test_interactive_transfer_writes_in_batches(monkeypatch):
+    prompts = iter([
+        "mysql", "localhost", "3306", "root",        # source
+        "mongodb", "localhost", "27017", "",         # target
+        "shop", "items", "shop", "items_copy",       # schema & tabel
+        "", "",                                      # filter & kolom
+        "",                                          # batas baris per detik
+    ])
+    monkeypatch.setattr(transfer.Prompt, "ask", lambda *args, **kwargs: next(prompts))
+    monkeypatch.setattr(transfer.Confirm, "ask", lambda *args, **kwargs: False)
+    monkeypatch.setattr(transfer, "getpass", lambda prompt: "secret")
+
+    source, target = FakeSource(), FakeTarget()
+    configs = []
+
+    def fake_handler(config):
+        configs.append(config)
+        return source if config["db_type"] == "mysql" else target
+
+    monkeypatch.setattr(transfer, "get_handler_from_config", fake_handler)
+
+    transfer.interactive_transfer()
+
+    assert [c["db_type"] for c in configs] == ["mysql", "mongodb"]
+    assert sum(target.batches) == 1200
+    assert len(target.batches) > 1
+
+
+@pytest.mark.parametrize("written, expected", [(0, 1200), (300, 0)])
+def test_failed_fast_path_falls_back_only_when_nothing_was_written(monkeypatch, written, expected):
+    prompts = iter([
+        "mysql", "localhost", "3306", "root",
+        "mysql", "localhost", "3306", "root",
+        "shop", "items", "shop", "items_copy",
+        "", "", "",
+    ])
+    monkeypatch.setattr(transfer.Prompt, "ask", lambda *args, **kwargs: next(prompts))
+    monkeypatch.setattr(transfer.Confirm, "ask", lambda *args, **kwargs: False)
+    monkeypatch.setattr(transfer, "getpass", lambda prompt: "secret")
+
+    target = FakeTarget()
+    handlers = iter([FakeSource(), target])
+    monkeypatch.setattr(transfer, "get_handler_from_config", lambda config: next(handlers))
+
+    def broken_fast_path(*args):
+        raise transfer.FastPathError(RuntimeError("koneksi putus"), written)
+
+    monkeypatch.setattr(transfer, "get_fast_path", lambda source_type, target_type: broken_fast_path)
+
+    transfer.interactive_transfer()
+
+    assert sum(target.batches) == expected
@@ -0,0 +1,213 @@
+import os
+import time
+
+from db.rowbatch import RowBatch
+
+# Batas default, bisa diubah lewat .env
+DEFAULT_BATCH_SIZE = int(os.getenv("BATCH_SIZE", 500))
+MIN_BATCH_SIZE = int(os.getenv("BATCH_SIZE_MIN", 1))
+MAX_BATCH_SIZE = int(os.getenv("BATCH_SIZE_MAX", 50000))
+TARGET_BATCH_SECONDS = float(os.getenv("BATCH_TARGET_SECONDS", 0.5))
+
+# Pesan error server yang menandakan batch terlalu besar
+TOO_LARGE_MARKERS = (
+    "max_allowed_packet",
+    "packet too large",
+    "packet bigger than",
+    "batch too large",
+    "batch_size_fail_threshold",
+    "documenttoolarge",
+    "document too large",
+    "bsonobjecttoolarge",
+    "message too large",
+    "exceeds maximum",
+)
+
+
+def is_batch_too_large(error: Exception) -> bool:
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in TOO_LARGE_MARKERS)
+
+
+def estimate_row_bytes(row: dict) -> int:
+    # Perkiraan kasar ukuran payload satu baris
+    return sum(len(str(k)) + len(str(v)) for k, v in row.items())
+
+
+class AdaptiveBatchSizer:
+    """Mengatur ukuran batch berdasarkan latensi, ukuran payload, dan error server."""
+
+    def __init__(self, initial: int = DEFAULT_BATCH_SIZE, min_size: int = MIN_BATCH_SIZE,
+                 max_size: int = MAX_BATCH_SIZE, target_seconds: float = TARGET_BATCH_SECONDS,
+                 max_bytes: int = None):
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.target_seconds = target_seconds
+        self.max_bytes = max_bytes
+        self.size = self._clamp(initial)
+        self.best_size = self.size
+        self.best_throughput = 0.0
+        self.avg_row_bytes = None
+
+    def _clamp(self, size) -> int:
+        size = int(size)
+        if self.max_bytes and self.avg_row_bytes:
+            size = min(size, int(self.max_bytes / self.avg_row_bytes))
+        return max(self.min_size, min(self.max_size, size))
+
+    def record(self, rows: int, seconds: float, nbytes: int, warned: bool = False):
+        if rows <= 0:
+            return
+        row_bytes = nbytes / rows
+        if self.avg_row_bytes is None:
+            self.avg_row_bytes = row_bytes
+        else:
+            self.avg_row_bytes = 0.8 * self.avg_row_bytes + 0.2 * row_bytes
+
+        if warned:
+            # Server sudah memberi peringatan ukuran batch, mundur sebelum gagal
+            self.size = self._clamp(self.size * 0.7)
+            return
+
+        throughput = rows / max(seconds, 1e-6)
+        if throughput > self.best_throughput:
+            self.best_throughput = throughput
+            self.best_size = rows
+        elif rows > self.best_size and throughput < self.best_throughput * 0.9:
+            # Batch lebih besar justru lebih lambat, kembali ke ukuran terbaik
+            self.size = self._clamp(self.best_size)
+            self.best_throughput *= 0.95  # beban target bisa berubah, lupakan perlahan
+            return
+
+        if seconds > self.target_seconds * 1.5:
+            self.size = self._clamp(self.size * max(0.5, self.target_seconds / seconds))
+        elif seconds < self.target_seconds * 0.5:
+            self.size = self._clamp(self.size * 1.5 + 1)
+        else:
+            self.size = self._clamp(self.size * 1.1 + 1)
+
+    def shrink(self):
+        self.size = max(self.min_size, self.size // 2)
+        self.best_size = min(self.best_size, self.size)
+        self.best_throughput = 0.0
+
+
+def _upsert_row(handler, schema, table, row, key_columns) -> bool:
+    try:
+        return handler.upsert_many(schema, table, [row], key_columns) > 0
+    except Exception as e:
+        print("❌ Error:", e)
+        return False
+
+
+def batch_bytes(batch) -> int:
+    if isinstance(batch, RowBatch):
+        return batch.nbytes()
+    return sum(estimate_row_bytes(row) for row in batch)
+
+
+def _insert_batch(handler, schema, table, batch, sizer, upsert=False, key_columns=None, governor=None,
+                  nbytes=None) -> int:
+    if nbytes is None:
+        nbytes = batch_bytes(batch)
+    started = time.perf_counter()
+    try:
+        if upsert:
+            inserted = handler.upsert_many(schema, table, batch, key_columns)
+        else:
+            inserted = handler.insert_many(schema, table, batch)
+    except (NotImplementedError, ValueError):
+        # Kesalahan konfigurasi (tanpa PRIMARY KEY, kolom key tidak ada): setiap baris akan gagal
+        # dengan cara yang sama, jadi jangan diulang per baris
+        raise
+    except Exception as e:
+        if governor is not None:
+            governor.record_error(e)
+        if not is_batch_too_large(e) or len(batch) <= 1:
+            # Error per baris (duplikat, tipe data, dll): ulangi satu per satu
+            print("⚠️ Batch gagal, mencoba ulang per baris:", e)
+            rows = batch.to_dicts() if isinstance(batch, RowBatch) else batch
+            if upsert:
+                return sum(1 for row in rows if _upsert_row(handler, schema, table, row, key_columns))
+            return sum(1 for row in rows if handler.insert_data(schema, table, row))
+        # Pecah dua lalu ulangi dengan batch yang lebih kecil
+        sizer.shrink()
+        half = len(batch) // 2
+        return (_insert_batch(handler, schema, table, batch[:half], sizer, upsert, key_columns, governor)
+                + _insert_batch(handler, schema, table, batch[half:], sizer, upsert, key_columns, governor))
+    elapsed = time.perf_counter() - started
+    warned = bool(getattr(handler, "batch_warnings", None))
+    sizer.record(len(batch), elapsed, nbytes, warned=warned)
+    return inserted
+
+
+def rebatch(rows, sizer: AdaptiveBatchSizer):
+    """Potong aliran baris menjadi batch sebesar sizer.size.
+
+    Elemen rows boleh dict (satu baris, batch berupa list of dict) atau RowBatch
+    (banyak baris sekaligus, dipotong/digabung tanpa membuat dict per baris).
+    """
+    loose = []
+    pending, pending_rows = [], 0
+    for item in rows:
+        if isinstance(item, RowBatch):
+            if loose:
+                yield loose
+                loose = []
+            pending.append(item)
+            pending_rows += len(item)
+            if pending_rows < sizer.size:
+                continue
+            merged = RowBatch.concat(pending)
+            start = 0
+            while len(merged) - start >= sizer.size:
+                end = start + sizer.size
+                yield merged[start:end]
+                start = end
+            pending = [merged[start:]] if start < len(merged) else []
+            pending_rows = len(merged) - start
+        else:
+            if pending:
+                yield RowBatch.concat(pending)
+                pending, pending_rows = [], 0
+            loose.append(item)
+            if len(loose) >= sizer.size:
+                yield loose
+                loose = []
+    if pending:
+        yield RowBatch.concat(pending)
+    if loose:
+        yield loose
+
+
+def write_batches(handler, schema: str, table: str, rows, sizer: AdaptiveBatchSizer = None,
+                  upsert: bool = False, key_columns: list[str] = None, governor=None) -> tuple[int, int]:
+    """Tulis rows (iterable of dict atau RowBatch) ke target per batch, kembalikan (berhasil, total).
+
+    Dengan upsert=True baris yang key-nya sudah ada akan ditimpa, sehingga load bisa diulang.
+    governor (utils.governor.Governor) opsional membatasi laju tulis ke target.
+    """
+    if sizer is None:
+        sizer = AdaptiveBatchSizer(max_bytes=getattr(handler, "max_batch_bytes", None))
+
+    if upsert and not key_columns and not handler.primary_key(schema, table):
+        raise ValueError(f"Tabel '{schema}.{table}' tidak punya PRIMARY KEY, gunakan --key untuk upsert.")
+
+    success = total = 0
+    for batch in rebatch(rows, sizer):
+        if upsert and key_columns and not total:
+            # Cek sekali di awal, bukan gagal per baris saat retry
+            present = batch.columns if isinstance(batch, RowBatch) else {key for row in batch for key in row}
+            absent = [k for k in key_columns if k not in present]
+            if absent:
+                raise ValueError(f"Kolom key {', '.join(absent)} tidak ada di data, periksa --key.")
+        total += len(batch)
+        if governor is None:
+            success += _insert_batch(handler, schema, table, batch, sizer, upsert, key_columns)
+            continue
+        nbytes = batch_bytes(batch)
+        governor.throttle(len(batch), nbytes)
+        started = time.perf_counter()
+        success += _insert_batch(handler, schema, table, batch, sizer, upsert, key_columns, governor, nbytes)
+        governor.observe(time.perf_counter() - started)
+    return success, total
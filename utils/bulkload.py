@@ -0,0 +1,51 @@
+import json
+import os
+from contextlib import contextmanager
+
+INDEX_STATE_DIR = os.getenv("INDEX_STATE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "db-cli", "indexes"))
+
+
+def _state_path(handler, schema: str, table: str) -> str:
+    return os.path.join(INDEX_STATE_DIR, f"{handler.engine_name}_{schema}_{table}.json")
+
+
+def _save_state(path: str, state: dict):
+    """Simpan definisi index ke disk sebelum ada yang dilepas, supaya tidak hilang jika proses mati."""
+    os.makedirs(INDEX_STATE_DIR, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        # IndexModel MongoDB disimpan sebagai dokumen index-nya
+        json.dump(state, f, indent=2, default=lambda o: getattr(o, "document", str(o)))
+    os.replace(tmp, path)
+
+
+@contextmanager
+def deferred_indexes(handler, schema: str, table: str, enabled: bool = True, unlogged: bool = False):
+    """Lepas index sekunder & constraint selama bulk load, lalu bangun ulang di akhir.
+
+    Definisi index selalu dipulihkan, termasuk ketika load gagal di tengah jalan. Jika proses
+    mati sebelum sempat memulihkan, atau ada index yang gagal dibuat ulang, definisinya tetap
+    ada di INDEX_STATE_DIR.
+    """
+    if not enabled:
+        yield None
+        return
+
+    path = _state_path(handler, schema, table)
+    if os.path.exists(path):
+        # Load sebelumnya berhenti sebelum index dibangun ulang; capture sekarang tidak akan melihatnya
+        raise RuntimeError(f"Index {schema}.{table} dari load sebelumnya belum dipulihkan, lihat {path} "
+                           "lalu hapus file tersebut setelah index dibuat ulang.")
+
+    state = handler.capture_indexes(schema, table)
+    _save_state(path, state)
+    try:
+        handler.drop_indexes(schema, table, state, unlogged=unlogged)
+        yield state
+    finally:
+        print("🔧 Membangun ulang index dan constraint...")
+        failed = handler.restore_indexes(schema, table, state)
+        if failed:
+            print(f"⚠️ {len(failed)} index/constraint gagal dipulihkan, definisinya disimpan di {path}")
+        else:
+            os.remove(path)
@@ -0,0 +1,143 @@
+import csv
+import io
+import mmap
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from db.rowbatch import RowBatch
+
+CHUNK_BYTES = int(os.getenv("CSV_CHUNK_BYTES", 16 * 1024 * 1024))
+IMPORT_WORKERS = int(os.getenv("CSV_IMPORT_WORKERS", os.cpu_count() or 1))
+
+QUOTE = ord('"')
+NEWLINE = b"\n"
+
+
+def _to_bool(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "t", "yes", "y")
+
+
+def _converter_for(type_name) -> callable:
+    # Tipe dari describe_table: MySQL "int(11)", Postgres "integer", Cassandra "bigint", dst.
+    t = str(type_name or "").lower()
+    if "bool" in t or t == "tinyint(1)":
+        return _to_bool
+    if "int" in t and "interval" not in t and "point" not in t:
+        return int
+    if "decimal" in t or "numeric" in t:
+        return Decimal
+    if "float" in t or "double" in t or "real" in t:
+        return float
+    return None
+
+
+def build_converters(columns: list[str], column_types: dict) -> list:
+    """Satu converter per kolom, dihitung sekali dari struktur tabel (None = biarkan string)."""
+    return [_converter_for(column_types.get(col)) for col in columns]
+
+
+def _convert(value: str, converter):
+    if value == "":
+        return None
+    if converter is None:
+        return value
+    try:
+        return converter(value)
+    except (ValueError, InvalidOperation):
+        # Biarkan database yang menolak/menerima nilai aneh
+        return value
+
+
+def _find_row_end(mm, pos: int) -> int:
+    """Posisi setelah newline pertama >= pos yang berada di luar tanda kutip (parity dihitung dari pos)."""
+    in_quotes = False
+    while True:
+        nl = mm.find(NEWLINE, pos)
+        if nl == -1:
+            return len(mm)
+        if mm[pos:nl].count(QUOTE) % 2:
+            in_quotes = not in_quotes
+        if not in_quotes:
+            return nl + 1
+        pos = nl + 1
+
+
+def split_ranges(mm, start: int, chunk_bytes: int) -> list[tuple[int, int]]:
+    """Pecah file menjadi rentang byte yang selalu berakhir di batas baris (quote-aware).
+
+    Tanda kutip di-escape sebagai "", jadi jumlah kutip ganjil dalam satu rentang berarti
+    posisi tersebut masih di dalam field ber-kutip.
+    """
+    ranges = []
+    size = len(mm)
+    pos = start
+    while pos < size:
+        end = min(pos + chunk_bytes, size)
+        if end < size:
+            in_quotes = mm[pos:end].count(QUOTE) % 2 == 1
+            nl = mm.find(NEWLINE, end)
+            while nl != -1:
+                if mm[end:nl].count(QUOTE) % 2:
+                    in_quotes = not in_quotes
+                if not in_quotes:
+                    break
+                end = nl + 1
+                nl = mm.find(NEWLINE, end)
+            end = size if nl == -1 else nl + 1
+        ranges.append((pos, end))
+        pos = end
+    return ranges
+
+
+def _parse_range(path: str, start: int, end: int, converters: list) -> list[tuple]:
+    # Dijalankan di worker process: baca rentang lewat mmap, parse dan konversi nilai
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        text = mm[start:end].decode("utf-8")
+    reader = csv.reader(io.StringIO(text, newline=""))
+    # Baris yang kolomnya kurang dari header diisi None supaya transpos ke kolom tetap rata
+    padding = (None,) * len(converters)
+    return [(tuple(_convert(v, c) for v, c in zip(record, converters)) + padding)[:len(converters)]
+            for record in reader if record]
+
+
+def iter_csv_batches(path: str, column_types: dict = None, workers: int = IMPORT_WORKERS,
+                     chunk_bytes: int = CHUNK_BYTES):
+    """Baca CSV besar secara paralel, hasilkan satu RowBatch per rentang sesuai urutan file.
+
+    Jumlah rentang yang sedang diproses dibatasi (2 x workers) agar memori tetap terbatas.
+    """
+    column_types = column_types or {}
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header_end = _find_row_end(mm, 0)
+            header_text = mm[:header_end].decode("utf-8-sig")
+            columns = next(csv.reader(io.StringIO(header_text, newline="")), [])
+            ranges = split_ranges(mm, header_end, chunk_bytes)
+
+    converters = build_converters(columns, column_types)
+
+    if workers <= 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            yield RowBatch.from_tuples(columns, _parse_range(path, start, end, converters))
+        return
+
+    # spawn, bukan fork: proses utama bisa punya thread aktif (driver database, governor)
+    # dan fork dari proses multi-thread bisa mewarisi lock yang sedang terkunci
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque()
+        remaining = iter(ranges)
+        for start, end in remaining:
+            pending.append(pool.submit(_parse_range, path, start, end, converters))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            chunk = pending.popleft().result()
+            nxt = next(remaining, None)
+            if nxt is not None:
+                pending.append(pool.submit(_parse_range, path, nxt[0], nxt[1], converters))
+            yield RowBatch.from_tuples(columns, chunk)
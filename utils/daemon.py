@@ -0,0 +1,191 @@
+# Daemon: simpan koneksi & metadata katalog tetap hangat, layani perintah CLI lewat Unix socket.
+# Modul ini sengaja hanya memakai standard library: cli.py meneruskan perintah lewat forward()
+# sebelum typer, rich, dan driver database di-import.
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+DAEMON_SOCKET = os.getenv("DAEMON_SOCKET", os.path.join(os.path.expanduser("~"), ".cache", "db-cli", "daemon.sock"))
+CATALOG_TTL = float(os.getenv("DAEMON_CATALOG_TTL", 30))
+
+# Perintah tanpa prompt interaktif yang aman dijalankan di daemon
+FORWARDABLE = {
+    "schema:read", "table:read", "table:read-data", "table:search",
+    "table:snapshot", "table:export", "table:import", "table:create-data",
+}
+CATALOG_METHODS = {"read_schemas", "read_tables", "describe_table", "primary_key"}
+SCHEMA_CHANGING = {"create_schema", "delete_schema", "create_table", "delete_table"}
+# Nama kelas exception driver yang menandakan koneksi rusak (pymysql/psycopg2, pymongo, cassandra)
+CONNECTION_ERRORS = {"OperationalError", "InterfaceError", "ConnectionFailure", "NoHostAvailable",
+                     "ConnectionException", "OperationTimedOut"}
+
+
+class WarmHandler:
+    """Proxy handler yang meng-cache hasil query katalog selama CATALOG_TTL detik."""
+
+    def __init__(self, handler):
+        self._handler = handler
+        self._cache = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._handler, name)
+        if not callable(attr):
+            return attr
+        if name in CATALOG_METHODS:
+            def cached(*args, **kwargs):
+                key = (name, args, tuple(sorted(kwargs.items())))
+                hit = self._cache.get(key)
+                if hit and time.monotonic() - hit[0] < CATALOG_TTL:
+                    return hit[1]
+                value = attr(*args, **kwargs)
+                self._cache[key] = (time.monotonic(), value)
+                return value
+            return cached
+        if name in SCHEMA_CHANGING:
+            self._cache.clear()
+        return attr
+
+
+class HandlerPool:
+    def __init__(self, factory):
+        self.factory = factory
+        self.handlers = {}
+
+    def get(self, db: str):
+        if db not in self.handlers:
+            self.handlers[db] = WarmHandler(self.factory(db))
+        return self.handlers[db]
+
+    def clear(self):
+        self.handlers.clear()
+
+    def end_transactions(self):
+        """Akhiri transaksi yang masih terbuka setelah setiap perintah.
+
+        Koneksi pymysql tidak autocommit: tanpa ini, SELECT pada perintah berikutnya masih
+        membaca snapshot REPEATABLE READ dari perintah pertama dan tidak melihat data baru.
+        """
+        for db, handler in list(self.handlers.items()):
+            conn = getattr(handler._handler, "conn", None)
+            try:
+                if conn is not None:
+                    conn.commit()
+            except Exception:
+                # Koneksi rusak: buat ulang di perintah berikutnya
+                del self.handlers[db]
+
+
+def _is_connection_error(error: Exception) -> bool:
+    return isinstance(error, OSError) or any(cls.__name__ in CONNECTION_ERRORS for cls in type(error).__mro__)
+
+
+def _run_command(command, pool, request: dict) -> dict:
+    # Hanya dibutuhkan di proses daemon; typer membawa click sendiri (typer._click)
+    import typer
+    from typer._click import ClickException
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    code = 0
+    previous_cwd = os.getcwd()
+    previous_columns = os.environ.get("COLUMNS")
+    try:
+        os.chdir(request.get("cwd") or previous_cwd)
+        if request.get("columns"):
+            os.environ["COLUMNS"] = str(request["columns"])
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            sys.stdin = io.StringIO("")  # prompt tidak bisa dijawab dari daemon
+            try:
+                result = command.main(args=request["argv"], prog_name="cli.py", standalone_mode=False)
+                code = result if isinstance(result, int) else 0
+            except ClickException as e:
+                # Kesalahan pemakaian (opsi tidak dikenal, nilai tidak valid): koneksi tetap dipakai
+                e.show()
+                code = e.exit_code
+            except typer.Abort:
+                print("Aborted!", file=sys.stderr)
+                code = 1
+            except typer.Exit as e:
+                code = e.exit_code
+            except Exception as e:
+                print(f"❌ {type(e).__name__}: {e}", file=sys.stderr)
+                if _is_connection_error(e):
+                    # Koneksi rusak: buang semua handler, buat ulang di perintah berikutnya
+                    pool.clear()
+                code = 1
+            pool.end_transactions()
+    finally:
+        sys.stdin = sys.__stdin__
+        os.chdir(previous_cwd)
+        if previous_columns is None:
+            os.environ.pop("COLUMNS", None)
+        else:
+            os.environ["COLUMNS"] = previous_columns
+    return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "code": code}
+
+
+def serve(command, pool: HandlerPool, path: str = DAEMON_SOCKET):
+    """Jalankan daemon di foreground. Permintaan dilayani satu per satu (stdout dialihkan per perintah)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            line = self.rfile.readline()
+            if not line:
+                return
+            request = json.loads(line)
+            if request.get("cmd") == "ping":
+                response = {"code": 0, "stdout": "pong\n"}
+            elif request.get("cmd") == "shutdown":
+                response = {"code": 0, "stdout": "🛑 Daemon dihentikan.\n"}
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                response = _run_command(command, pool, request)
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+    with socketserver.UnixStreamServer(path, Handler) as server:
+        os.chmod(path, 0o600)
+        print(f"🚀 Daemon berjalan di {path}")
+        try:
+            server.serve_forever()
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def request(payload: dict, path: str = DAEMON_SOCKET, timeout: float = None) -> dict:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path)
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            return json.loads(f.readline())
+
+
+def forward(argv: list[str], path: str = DAEMON_SOCKET):
+    """Kirim perintah ke daemon jika sedang berjalan. None = jalankan secara lokal."""
+    if not argv or argv[0] not in FORWARDABLE or "-" in argv or not os.path.exists(path):
+        return None
+    if os.getenv("DAEMON_DISABLE"):
+        return None
+    if argv[0] == "table:create-data" and not any(arg.startswith("--data") for arg in argv):
+        return None  # tanpa --data perintah ini interaktif
+    payload = {"argv": argv, "cwd": os.getcwd()}
+    try:
+        payload["columns"] = os.get_terminal_size().columns
+    except OSError:
+        pass
+    try:
+        response = request(payload, path)
+    except (ConnectionError, FileNotFoundError, socket.timeout):
+        return None
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stderr.write(response.get("stderr", ""))
+    return response.get("code", 0)
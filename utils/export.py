@@ -0,0 +1,135 @@
+import csv
+import io
+import re
+from array import array
+
+from db.rowbatch import as_rowbatch
+from utils import ndjson
+
+EXPORT_FORMATS = ("csv", "ndjson", "parquet")
+DECIMAL_TYPE = re.compile(r"(?:decimal|numeric)\s*\((\d+)\s*(?:,\s*(\d+))?\)")
+
+
+def export_columns(structure: list[dict], row_filter=None) -> list[str]:
+    """Urutan kolom export dari describe_table (atau --columns), bukan dari batch pertama."""
+    if row_filter is not None and row_filter.columns:
+        return list(row_filter.columns)
+    return [col.get("Column") or col.get("Field") for col in structure or []]
+
+
+def export_types(structure: list[dict]) -> dict:
+    """{kolom: tipe dari describe_table}, dipakai parquet untuk menetapkan skema file."""
+    return {col.get("Column") or col.get("Field"): col.get("Type") for col in structure or []}
+
+
+def write_export(stream, batches, fmt: str, columns: list[str] = None, types: dict = None) -> int:
+    # Tulis per batch dan flush, sehingga memori tetap walau tabel besar
+    count = 0
+    if fmt == "ndjson":
+        for batch in batches:
+            count += ndjson.write_rows(stream, batch)
+        return count
+
+    if fmt == "parquet":
+        return write_parquet(stream, batches, types)
+
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    column_names = None
+    for batch in batches:
+        batch = as_rowbatch(batch)
+        if column_names is None:
+            # Kolom NULL di seluruh batch pertama tetap masuk header; struktur MongoDB hanya
+            # dari satu dokumen contoh, jadi field lain di batch pertama ikut ditambahkan
+            column_names = list(columns or []) + [col for col in batch.columns if col not in (columns or [])]
+            writer.writerow(column_names)
+        writer.writerows(batch.select(column_names).rows())
+        text.flush()
+        count += len(batch)
+    text.detach()  # jangan tutup stream (mis. stdout) saat wrapper dibuang
+    return count
+
+
+def _arrow_type(pa, type_name):
+    """Tipe Arrow dari nama tipe describe_table (SQL, CQL, atau nama tipe Python dari MongoDB).
+
+    None jika tipe tidak diketahui (mis. field MongoDB yang tidak ada di dokumen contoh).
+    """
+    if not type_name:
+        return None
+    t = str(type_name).lower()
+    if "bool" in t or t == "tinyint(1)":
+        return pa.bool_()
+    if "int" in t and "interval" not in t and "point" not in t:
+        return pa.int64()
+    if "float" in t or "double" in t or "real" in t:
+        return pa.float64()
+    if "timestamp" in t or "datetime" in t:
+        return pa.timestamp("us")
+    if t == "date":
+        return pa.date32()
+    if "blob" in t or "bytea" in t or "binary" in t or t == "bytes":
+        return pa.binary()
+    decimal = DECIMAL_TYPE.search(t)
+    if decimal:
+        precision, scale = int(decimal.group(1)), int(decimal.group(2) or 0)
+        return pa.decimal128(precision, scale) if precision <= 38 else pa.decimal256(precision, scale)
+    # decimal tanpa presisi, teks, uuid, time, ObjectId, dan tipe lain: disimpan sebagai teks
+    return pa.string()
+
+
+def write_parquet(stream, batches, types: dict = None) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Format parquet butuh paket 'pyarrow'.")
+    types = types or {}
+    inferable = (pa.types.is_integer, pa.types.is_floating, pa.types.is_boolean, pa.types.is_timestamp,
+                 pa.types.is_date, pa.types.is_binary, pa.types.is_string)
+
+    def to_arrow(col, type_=None):
+        # Kolom int64/float64 dari RowBatch dibungkus langsung sebagai buffer Arrow tanpa salin
+        if isinstance(col, array):
+            arrow_type = pa.int64() if col.typecode == "q" else pa.float64()
+            if type_ is None or type_ == arrow_type:
+                return pa.Array.from_buffers(arrow_type, len(col), [None, pa.py_buffer(col)])
+        values = list(col)
+        if type_ is None:
+            # Tipe tidak diketahui: tebak dari data, kecuali tipe yang bisa berubah antar batch
+            # (decimal dengan presisi batch ini, null) atau tidak dikenal Arrow (ObjectId, UUID)
+            try:
+                arr = pa.array(values)
+                if any(check(arr.type) for check in inferable):
+                    return arr
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                pass
+            type_ = pa.string()
+        if pa.types.is_string(type_):
+            values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+        try:
+            return pa.array(values, type=type_)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mis. tinyint(1) MySQL berisi 0/1 untuk kolom boolean
+            return pa.array(values).cast(type_)
+
+    count = 0
+    writer = None
+    try:
+        for batch in batches:
+            batch = as_rowbatch(batch)
+            if writer is None:
+                # Skema ditetapkan sekali dari struktur tabel, supaya batch berikutnya (decimal dengan
+                # presisi lain, kolom yang NULL di batch pertama) tidak ditolak
+                arrays = [to_arrow(col, _arrow_type(pa, types.get(name)))
+                          for name, col in zip(batch.columns, batch.arrays)]
+                schema = pa.schema([(name, arr.type) for name, arr in zip(batch.columns, arrays)])
+                writer = pq.ParquetWriter(stream, schema)
+            else:
+                arrays = [to_arrow(col, f.type) for col, f in zip(batch.select(schema.names).arrays, schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
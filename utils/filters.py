@@ -0,0 +1,223 @@
+# Filter (--where) dan proyeksi kolom (--columns) yang didorong ke server database
+import re
+
+from utils import ndjson
+
+IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_.]*$")
+CLAUSE = re.compile(
+    r"^\s*([A-Za-z_][A-Za-z0-9_.]*)\s*(>=|<=|!=|<>|=|>|<|LIKE\b|IN\b|IS\s+NOT\s+NULL|IS\s+NULL)\s*(.*?)\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+NUMBER = re.compile(r"^-?\d+(\.\d+)?([eE][-+]?\d+)?$")
+BARE_WORD = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+MONGO_OPS = {"!=": "$ne", ">": "$gt", ">=": "$gte", "<": "$lt", "<=": "$lte", "IN": "$in"}
+
+
+def _split_outside_quotes(text: str, separator: str) -> list[str]:
+    """Pecah text pada separator (regex) yang tidak berada di dalam tanda kutip."""
+    parts, start, pos = [], 0, 0
+    quote = None  # kutip yang sedang terbuka; kutip jenis lain di dalamnya hanya karakter biasa
+    for match in re.finditer(separator, text, re.IGNORECASE):
+        for char in text[pos:match.start()]:
+            if quote is None and char in "'\"":
+                quote = char
+            elif char == quote:
+                quote = None  # kutip ganda ('it''s') menutup lalu membuka lagi, hasilnya tetap benar
+        pos = match.end()
+        if quote is None:
+            parts.append(text[start:match.start()])
+            start = match.end()
+    parts.append(text[start:])
+    return parts
+
+
+def _literal(text: str):
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "'\"":
+        quote = text[0]
+        return text[1:-1].replace(quote * 2, quote)
+    lowered = text.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if lowered == "null":
+        raise ValueError("Gunakan IS NULL / IS NOT NULL untuk membandingkan dengan NULL.")
+    if NUMBER.match(text):
+        return float(text) if any(c in text for c in ".eE") else int(text)
+    if BARE_WORD.match(text):
+        return text
+    # Mis. "1 OR 1=1" atau "18 AND" (AND tanpa kondisi sesudahnya): jangan diam-diam jadi teks
+    raise ValueError(f"Nilai tidak valid: '{text}', gunakan tanda kutip untuk teks.")
+
+
+def parse_where(text: str) -> list[tuple]:
+    """'umur >= 18 AND kota IN ('Bandung', 'Bogor')' -> [(kolom, operator, nilai), ...]."""
+    predicates = []
+    for clause in _split_outside_quotes(text, r"\s+AND\s+"):
+        match = CLAUSE.match(clause)
+        if not match:
+            raise ValueError(f"Kondisi tidak valid: '{clause.strip()}' (format: kolom operator nilai)")
+        column, op, value = match.groups()
+        op = " ".join(op.upper().split()).replace("<>", "!=")
+        if op in ("IS NULL", "IS NOT NULL"):
+            if value:
+                raise ValueError(f"Kondisi tidak valid: '{clause.strip()}'")
+            predicates.append((column, op, None))
+        elif op == "IN":
+            if not (value.startswith("(") and value.endswith(")")):
+                raise ValueError(f"IN butuh daftar nilai dalam kurung: '{clause.strip()}'")
+            items = [item.strip() for item in _split_outside_quotes(value[1:-1], r",") if item.strip()]
+            if not items:
+                raise ValueError(f"Daftar IN kosong: '{clause.strip()}'")
+            predicates.append((column, op, [_literal(item) for item in items]))
+        else:
+            if not value:
+                raise ValueError(f"Nilai kosong: '{clause.strip()}'")
+            predicates.append((column, op, _literal(value)))
+    return predicates
+
+
+class RowFilter:
+    """Filter baris + proyeksi kolom yang sudah divalidasi, siap diterjemahkan per engine."""
+
+    def __init__(self, predicates: list[tuple] = None, columns: list[str] = None, raw: dict = None,
+                 allow_filtering: bool = False):
+        self.predicates = predicates or []
+        self.columns = columns or None
+        self.raw = raw  # filter JSON asli MongoDB
+        self.allow_filtering = allow_filtering
+
+    def names(self) -> list[str]:
+        return list(dict.fromkeys([col for col, _, _ in self.predicates] + (self.columns or [])))
+
+    def validate(self, structure: list[dict]):
+        """Pastikan semua kolom ada di struktur tabel (describe_table). Struktur kosong = schemaless."""
+        known = {col.get("Column") or col.get("Field") for col in structure or []}
+        unknown = [name for name in self.names() if known and name not in known]
+        if unknown:
+            raise ValueError(f"Kolom tidak dikenal: {', '.join(unknown)}")
+
+    def sql(self, quote, placeholder: str = "%s", operand=None) -> tuple[str, list[str], list]:
+        """(daftar SELECT, kondisi WHERE, parameter) untuk database SQL.
+
+        operand (opsional) menggantikan quote untuk kolom di perbandingan (=, <, IN, ...),
+        mis. CAST(... AS NUMERIC) di snapshot SQLite; daftar SELECT tetap memakai quote.
+        """
+        if self.raw is not None:
+            raise ValueError("Filter JSON hanya didukung untuk MongoDB.")
+        operand = operand or quote
+        select = ", ".join(quote(col) for col in self.columns) if self.columns else "*"
+        conditions, params = [], []
+        for column, op, value in self.predicates:
+            if op in ("IS NULL", "IS NOT NULL"):
+                conditions.append(f"{quote(column)} {op}")
+            elif op == "IN":
+                conditions.append(f"{operand(column)} IN ({', '.join([placeholder] * len(value))})")
+                params.extend(value)
+            else:
+                column_ref = quote(column) if op == "LIKE" else operand(column)
+                conditions.append(f"{column_ref} {op} {placeholder}")
+                params.append(value)
+        return select, conditions, params
+
+    def mongo(self) -> tuple[dict, dict]:
+        """(query, projection) untuk find(); projection None = semua field."""
+        query = dict(self.raw or {})
+        for column, op, value in self.predicates:
+            if op == "=":
+                condition = value
+            elif op == "LIKE":
+                pattern = "".join(".*" if c == "%" else "." if c == "_" else re.escape(c) for c in value)
+                condition = {"$regex": f"^{pattern}$"}
+            elif op == "IS NULL":
+                condition = None
+            elif op == "IS NOT NULL":
+                condition = {"$ne": None}
+            else:
+                condition = {MONGO_OPS[op]: value}
+            existing = query.get(column)
+            if isinstance(existing, dict) and isinstance(condition, dict) and not existing.keys() & condition.keys():
+                existing.update(condition)  # mis. umur > 18 AND umur < 60
+            elif column in query:
+                query.setdefault("$and", []).append({column: condition})
+            else:
+                query[column] = condition
+        projection = None
+        if self.columns:
+            projection = {col: 1 for col in self.columns}
+            if "_id" not in self.columns:
+                projection["_id"] = 0
+        return query, projection
+
+    def cql(self, partition_keys: list[str], clustering_keys: list[str]) -> tuple[str, list[str], list, bool]:
+        """Seperti sql(), ditambah apakah query butuh ALLOW FILTERING.
+
+        Tanpa ALLOW FILTERING, CQL hanya menerima = / IN pada seluruh partition key dan
+        pembatasan kolom clustering; selebihnya ditolak kecuali --allow-filtering dipakai.
+        """
+        for column, op, _ in self.predicates:
+            if op in ("!=", "LIKE", "IS NULL", "IS NOT NULL"):
+                raise ValueError(f"Operator {op} ({column}) tidak didukung oleh CQL.")
+        select, conditions, params = self.sql(lambda col: col)
+        restricted = {col for col, op, _ in self.predicates if op in ("=", "IN")}
+        partition_ok = not self.predicates or all(key in restricted for key in partition_keys)
+        others_ok = all(col in partition_keys or col in clustering_keys for col, _, _ in self.predicates)
+        partition_ops_ok = all(op in ("=", "IN") for col, op, _ in self.predicates if col in partition_keys)
+        filtering = not (partition_ok and others_ok and partition_ops_ok)
+        if filtering and not self.allow_filtering:
+            raise ValueError(
+                f"Filter ini butuh ALLOW FILTERING (partition key: {', '.join(partition_keys)}). "
+                "Tambahkan --allow-filtering jika scan di server memang diinginkan."
+            )
+        return select, conditions, params, filtering
+
+
+def parse_filter(where: str = None, columns: str = None, structure: list[dict] = None,
+                 allow_filtering: bool = False, search: tuple = None) -> RowFilter:
+    """Buat RowFilter dari opsi CLI; None jika tidak ada filter maupun proyeksi.
+
+    search = (kolom, kata kunci) dari table:search, ditambahkan sebagai kondisi LIKE sebelum validasi.
+    """
+    where = (where or "").strip()
+    if not where and not columns:
+        return None
+    names = [name.strip() for name in (columns or "").split(",") if name.strip()]
+    for name in names:
+        if not IDENTIFIER.match(name):
+            raise ValueError(f"Nama kolom tidak valid: '{name}'")
+    if where.startswith("{"):
+        # Filter MongoDB dalam JSON; tipe khusus memakai tag NDJSON, mis. {"$datetime": "..."}
+        row_filter = RowFilter(columns=names, raw=ndjson.loads(where.encode("utf-8")),
+                               allow_filtering=allow_filtering)
+    else:
+        row_filter = RowFilter(parse_where(where) if where else [], names, allow_filtering=allow_filtering)
+    if search:
+        column, keyword = search
+        if not IDENTIFIER.match(column):
+            raise ValueError(f"Nama kolom tidak valid: '{column}'")
+        row_filter.predicates.append((column, "LIKE", f"%{keyword}%"))
+    row_filter.validate(structure)
+    return row_filter
+
+
+def sql_query(table_ref: str, row_filter: RowFilter, quote, since: tuple = None,
+              placeholder: str = "%s", operand=None) -> tuple[str, list]:
+    """SELECT lengkap untuk database SQL, menggabungkan filter dengan since (refresh inkremental)."""
+    select, conditions, params = row_filter.sql(quote, placeholder, operand) if row_filter else ("*", [], [])
+    if since:
+        conditions.append(f"{quote(since[0])} > {placeholder}")
+        params.append(since[1])
+    query = f"SELECT {select} FROM {table_ref}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    return query, params
+
+
+def project_structure(structure: list[dict], row_filter: RowFilter) -> list[dict]:
+    """Struktur tabel (describe_table) yang hanya berisi kolom hasil proyeksi, untuk membuat tabel target."""
+    if not row_filter or not row_filter.columns:
+        return structure
+    return [col for col in structure if (col.get("Column") or col.get("Field")) in row_filter.columns]
+
+
+def column_definitions(structure: list[dict]) -> list[dict]:
+    """Ubah hasil describe_table (Column/Field, Type) ke format create_table (name, type)."""
+    return [{"name": col.get("Column") or col.get("Field"), "type": col.get("Type")} for col in structure]
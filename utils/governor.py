@@ -0,0 +1,208 @@
+# Governor: batasi laju baca/tulis supaya transfer tidak mengganggu trafik produksi
+import json
+import os
+import sys
+import time
+
+from utils.batching import batch_bytes
+
+GOVERNOR_CONTROL_FILE = os.getenv("GOVERNOR_CONTROL_FILE")
+SIGNAL_INTERVAL = float(os.getenv("GOVERNOR_SIGNAL_SECONDS", 5))
+CONTROL_INTERVAL = 1.0
+MIN_FACTOR = 0.05
+RAMP_PER_SECOND = 0.05  # naik 5% dari laju penuh per detik setelah mundur
+
+OVERLOAD_MARKERS = (
+    "timeout",
+    "timed out",
+    "overloaded",
+    "unavailable",
+    "too many connections",
+    "writetimeout",
+    "readtimeout",
+)
+
+
+def is_overload_error(error: Exception) -> bool:
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in OVERLOAD_MARKERS)
+
+
+def _log(message: str):
+    # stderr, karena stdout bisa berisi data (table:export -)
+    print(message, file=sys.stderr)
+
+
+class TokenBucket:
+    """Token bucket dengan kapasitas satu detik; rate None = tanpa batas."""
+
+    def __init__(self, rate: float = None):
+        self.rate = rate
+        self.tokens = rate or 0
+        self.updated = time.monotonic()
+
+    def set_rate(self, rate: float):
+        self.rate = rate
+        self.tokens = min(self.tokens, rate or 0)
+
+    def delay(self, amount: float) -> float:
+        """Ambil token dan kembalikan lama menunggu (detik). Token boleh minus agar batch besar tetap lewat."""
+        if not self.rate:
+            return 0.0
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= amount
+        return max(0.0, -self.tokens / self.rate)
+
+
+class Governor:
+    """Pembatas laju untuk satu sisi transfer (source atau target).
+
+    Laju efektif = batas token bucket x factor. factor turun setengah saat latensi melewati
+    max_latency, load_signal() handler >= 1, atau server timeout, lalu naik perlahan lagi.
+    Batas bisa diubah saat berjalan lewat file kontrol JSON, contoh:
+    {"rows_per_sec": 2000, "target": {"paused": true}}
+    """
+
+    def __init__(self, label: str, handler=None, rows_per_sec: float = None, bytes_per_sec: float = None,
+                 max_latency: float = None, protect: bool = False, control_file: str = GOVERNOR_CONTROL_FILE):
+        self.label = label
+        self.handler = handler if protect else None
+        self.rows = TokenBucket(rows_per_sec)
+        self.bytes = TokenBucket(bytes_per_sec)
+        self.max_latency = max_latency
+        self.paused = False
+        self.control_file = control_file
+        self.factor = 1.0
+        self.last_seconds = 0.0
+        self._updated = time.monotonic()
+        self._control_mtime = None
+        self._control_checked = 0.0
+        self._signal_checked = 0.0
+
+    def _reload_control(self):
+        now = time.monotonic()
+        if not self.control_file or now - self._control_checked < CONTROL_INTERVAL:
+            return
+        self._control_checked = now
+        try:
+            mtime = os.stat(self.control_file).st_mtime
+        except OSError:
+            return
+        if mtime == self._control_mtime:
+            return
+        self._control_mtime = mtime
+        try:
+            with open(self.control_file) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            _log(f"⚠️ File kontrol governor tidak valid: {e}")
+            return
+        # Key level atas berlaku untuk semua sisi, bagian {"source": {...}} / {"target": {...}} menimpanya
+        settings = {k: v for k, v in data.items() if not isinstance(v, dict)}
+        settings.update(data.get(self.label, {}))
+        if "rows_per_sec" in settings:
+            self.rows.set_rate(settings["rows_per_sec"])
+        if "bytes_per_sec" in settings:
+            self.bytes.set_rate(settings["bytes_per_sec"])
+        if "max_latency" in settings:
+            self.max_latency = settings["max_latency"]
+        self.paused = bool(settings.get("paused", False))
+        _log(f"🎛️ Governor {self.label}: {settings}")
+
+    def _back_off(self, reason: str):
+        factor = max(MIN_FACTOR, self.factor / 2)
+        if factor < self.factor * 0.75:  # sudah di batas bawah: jangan ulangi pesan yang sama
+            _log(f"🐢 Governor {self.label}: {reason}, laju turun ke {factor:.0%}")
+        self.factor = factor
+        self._updated = time.monotonic()
+
+    def _ramp_up(self):
+        now = time.monotonic()
+        self.factor = min(1.0, self.factor + (now - self._updated) * RAMP_PER_SECOND)
+        self._updated = now
+
+    def _check_signal(self):
+        now = time.monotonic()
+        if self.handler is None or now - self._signal_checked < SIGNAL_INTERVAL:
+            return
+        self._signal_checked = now
+        try:
+            load = self.handler.load_signal()
+        except Exception as e:
+            _log(f"⚠️ Governor {self.label}: sinyal beban tidak bisa dibaca ({e}), hanya memakai latensi.")
+            self.handler = None
+            return
+        if load is None:
+            self.handler = None
+            return
+        if load >= 1:
+            self._back_off(f"server sibuk (beban {load:.1f}x batas)")
+        # Jauh di atas batas: berhenti total sampai server pulih
+        while load >= 2:
+            _log(f"⏸️ Governor {self.label}: jeda, beban {load:.1f}x batas")
+            time.sleep(SIGNAL_INTERVAL)
+            try:
+                load = self.handler.load_signal() or 0
+            except Exception:
+                load = 0
+            self._updated = time.monotonic()
+
+    def throttle(self, rows: int, nbytes: int):
+        """Dipanggil sebelum satu batch dibaca/ditulis; tidur selama yang dibutuhkan."""
+        self._reload_control()
+        while self.paused:
+            time.sleep(CONTROL_INTERVAL)
+            self._reload_control()
+        self._check_signal()
+        self._ramp_up()
+        wait = max(self.rows.delay(rows / self.factor), self.bytes.delay(nbytes / self.factor))
+        if self.factor < 1:
+            # Tanpa batas eksplisit pun, factor < 1 menyisakan jeda proporsional untuk server
+            wait = max(wait, self.last_seconds * (1 - self.factor) / self.factor)
+        if wait > 0:
+            time.sleep(wait)
+
+    def observe(self, seconds: float):
+        self.last_seconds = seconds
+        if self.max_latency and seconds > self.max_latency:
+            self._back_off(f"latensi {seconds:.2f}s > {self.max_latency}s")
+
+    def record_error(self, error: Exception):
+        if is_overload_error(error):
+            self._back_off(f"server timeout ({type(error).__name__})")
+            time.sleep(min(30.0, 1.0 / self.factor))
+
+
+def build_governor(label: str, handler, rows_per_sec: float = None, bytes_per_sec: float = None,
+                   max_latency: float = None, protect: bool = False, control_file: str = None) -> Governor:
+    """Governor hanya dibuat jika ada batas, proteksi, atau file kontrol yang diminta, selain itu None.
+
+    GOVERNOR_CONTROL_FILE dari env hanya menjadi default file kontrol governor yang memang
+    dibuat; env itu sendiri tidak mengaktifkan governor (dan tidak mematikan jalur cepat).
+    """
+    if not any((rows_per_sec, bytes_per_sec, max_latency, protect, control_file)):
+        return None
+    return Governor(label, handler, rows_per_sec, bytes_per_sec, max_latency, protect,
+                    control_file or GOVERNOR_CONTROL_FILE)
+
+
+def governed(batches, governor: Governor):
+    """Bungkus iterator batch dari source: ukur latensi baca dan tahan laju sesuai governor."""
+    if governor is None:
+        yield from batches
+        return
+    batches = iter(batches)
+    while True:
+        started = time.perf_counter()
+        try:
+            batch = next(batches)
+        except StopIteration:
+            return
+        except Exception as e:
+            governor.record_error(e)
+            raise
+        governor.observe(time.perf_counter() - started)
+        governor.throttle(len(batch), batch_bytes(batch))
+        yield batch
@@ -0,0 +1,130 @@
+import base64
+import datetime
+import json
+import uuid
+from decimal import Decimal
+
+try:
+    import orjson
+except ImportError:  # orjson opsional, json bawaan tetap jalan
+    orjson = None
+
+try:
+    from bson.objectid import ObjectId
+except ImportError:
+    ObjectId = None
+
+# Tipe yang tidak ada di JSON disimpan sebagai {"$tag": "nilai"} supaya bisa dikembalikan utuh
+TAGS = ("$decimal", "$datetime", "$date", "$time", "$binary", "$oid", "$uuid")
+
+
+def _encode_value(value):
+    if isinstance(value, Decimal):
+        return {"$decimal": str(value)}
+    if isinstance(value, datetime.datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {"$time": value.isoformat()}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"$binary": base64.b64encode(bytes(value)).decode("ascii")}
+    if isinstance(value, uuid.UUID):
+        return {"$uuid": str(value)}
+    if ObjectId is not None and isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    raise TypeError(f"Tipe {type(value).__name__} tidak bisa diubah ke JSON")
+
+
+def _decode_tag(tag, value):
+    if tag == "$decimal":
+        return Decimal(value)
+    if tag == "$datetime":
+        return datetime.datetime.fromisoformat(value)
+    if tag == "$date":
+        return datetime.date.fromisoformat(value)
+    if tag == "$time":
+        return datetime.time.fromisoformat(value)
+    if tag == "$binary":
+        return base64.b64decode(value)
+    if tag == "$uuid":
+        return uuid.UUID(value)
+    if tag == "$oid" and ObjectId is not None:
+        return ObjectId(value)
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if len(value) == 1:
+            tag, inner = next(iter(value.items()))
+            if tag in TAGS:
+                return _decode_tag(tag, inner)
+        return {k: _decode_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode_value(v) for v in value]
+    return value
+
+
+if orjson is not None:
+    # Passthrough: datetime/dataclass diserahkan ke _encode_value supaya tag sama dengan json bawaan
+    _OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_NON_STR_KEYS
+
+    def _tag_uuids(value):
+        # orjson selalu menulis UUID sebagai string biasa (tidak ada opsi passthrough), jadi ditandai lebih dulu
+        if isinstance(value, uuid.UUID):
+            return {"$uuid": str(value)}
+        if isinstance(value, dict):
+            return {k: _tag_uuids(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [_tag_uuids(v) for v in value]
+        return value
+
+    def dumps(row: dict) -> bytes:
+        if any(isinstance(v, (uuid.UUID, dict, list, tuple)) for v in row.values()):
+            row = _tag_uuids(row)
+        return orjson.dumps(row, default=_encode_value, option=_OPTIONS)
+
+    def _loads(line: bytes):
+        return orjson.loads(line)
+else:
+    def dumps(row: dict) -> bytes:
+        return json.dumps(row, default=_encode_value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def _loads(line: bytes):
+        return json.loads(line)
+
+
+def loads(line: bytes) -> dict:
+    return _decode_value(_loads(line))
+
+
+def _batch_lines(batch):
+    # Baris dibentuk langsung dari kolom RowBatch tanpa list dict perantara. Encode per kolom
+    # (satu dumps per sel) justru lebih lambat dari satu dumps per baris, jadi tetap per baris.
+    columns = batch.columns
+    if not batch.missing:
+        return (dumps(dict(zip(columns, row))) + b"\n" for row in batch.rows())
+    # Field yang tidak ada di dokumen asal tidak ditulis sebagai null
+    absent = [batch.missing.get(name, ()) for name in columns]
+    return (dumps({name: value for name, value, skip in zip(columns, row, absent) if i not in skip}) + b"\n"
+            for i, row in enumerate(batch.rows()))
+
+
+def write_rows(stream, rows) -> int:
+    """Tulis satu batch rows (list of dict atau RowBatch) ke stream biner sebagai NDJSON lalu flush."""
+    if hasattr(rows, "columns"):
+        lines = _batch_lines(rows)
+    else:
+        lines = (dumps(row) + b"\n" for row in rows)
+    stream.write(b"".join(lines))
+    stream.flush()
+    return len(rows)
+
+
+def read_rows(stream):
+    """Baca NDJSON dari stream biner baris per baris (memori tetap)."""
+    for line in stream:
+        line = line.strip()
+        if line:
+            yield loads(line)
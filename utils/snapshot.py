@@ -0,0 +1,227 @@
+import datetime
+import json
+import os
+import sqlite3
+import time
+import uuid
+from decimal import Decimal
+
+from db.rowbatch import as_rowbatch
+from utils import ndjson
+from utils.filters import RowFilter, sql_query
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(os.path.expanduser("~"), ".cache", "db-cli", "snapshots"))
+SNAPSHOT_MAX_BYTES = int(os.getenv("SNAPSHOT_MAX_BYTES", 1024 * 1024 * 1024))
+# Untuk tabel tanpa penanda perubahan yang murah (Cassandra, MySQL/MongoDB tanpa --watermark),
+# snapshot dianggap valid selama TTL
+SNAPSHOT_TTL = int(os.getenv("SNAPSHOT_TTL", 300))
+
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _to_sqlite(value):
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+
+def _is_numeric(values) -> bool:
+    sample = next((v for v in values if v is not None), None)
+    return isinstance(sample, (int, float, Decimal)) and not isinstance(sample, bool)
+
+
+def _encode_token(token: dict) -> str:
+    # Nilai watermark disimpan dengan tipe aslinya (datetime, Decimal, ObjectId, ...)
+    return ndjson.dumps(token).decode("utf-8")
+
+
+def _decode_token(text: str) -> dict:
+    return ndjson.loads(text.encode("utf-8"))
+
+
+class Snapshot:
+    """Salinan lokal satu tabel remote dalam file SQLite."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS _meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.table = "rows"
+        self.columns = [row[1] for row in self.conn.execute("PRAGMA table_info(rows)")]
+        self.numeric_columns = self.get_meta("numeric_columns", [])
+
+    def get_meta(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM _meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key: str, value):
+        self.conn.execute("INSERT OR REPLACE INTO _meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    @property
+    def token(self) -> dict:
+        text = self.get_meta("token")
+        return _decode_token(text) if text else None
+
+    def reset(self, key_columns: list[str] = None):
+        """Mulai refresh penuh di tabel rows_new; tabel rows lama tetap utuh sampai commit()."""
+        self.conn.execute("DROP TABLE IF EXISTS rows_new")  # sisa refresh yang gagal
+        self.table = "rows_new"
+        self.columns = []
+        self.numeric_columns = []
+        self.set_meta("key_columns", key_columns or [])
+        self.set_meta("numeric_columns", [])
+
+    def _ensure_columns(self, batch):
+        new = [name for name in batch.columns if name not in self.columns]
+        if not new:
+            return
+        # Tanpa afinitas kolom: Decimal tetap tersimpan sebagai teks aslinya ('5.00'). Kolom angka
+        # dicatat supaya filter --where membandingkannya lewat CAST, bukan sebagai teks
+        self.numeric_columns += [name for name in new if _is_numeric(batch.column(name))]
+        self.set_meta("numeric_columns", self.numeric_columns)
+        if not self.columns:
+            self.conn.execute(f"CREATE TABLE {self.table} ({', '.join(_quote(n) for n in new)})")
+            key_columns = self.get_meta("key_columns", [])
+            if key_columns and all(k in new for k in key_columns):
+                # Dipakai INSERT OR REPLACE saat refresh inkremental. Nama unik karena index ikut
+                # berpindah saat rows_new di-rename, sementara index tabel lama belum dihapus.
+                self.conn.execute(f"CREATE UNIQUE INDEX rows_key_{uuid.uuid4().hex[:8]} "
+                                  f"ON {self.table} ({', '.join(_quote(k) for k in key_columns)})")
+        else:
+            for name in new:
+                self.conn.execute(f"ALTER TABLE {self.table} ADD COLUMN {_quote(name)}")
+        self.columns.extend(new)
+
+    def write_batch(self, batch) -> int:
+        batch = as_rowbatch(batch)
+        names = batch.columns
+        self._ensure_columns(batch)
+        query = (f"INSERT OR REPLACE INTO {self.table} ({', '.join(_quote(n) for n in names)}) "
+                 f"VALUES ({', '.join('?' * len(names))})")
+        self.conn.executemany(query, ([_to_sqlite(v) for v in row] for row in batch.rows()))
+        return len(batch)
+
+    def commit(self, token: dict):
+        if self.table != "rows":
+            # Tukar tabel dalam satu transaksi: pembaca melihat data lama atau baru, tidak pernah kosong
+            if not self.conn.in_transaction:
+                self.conn.execute("BEGIN")
+            self.conn.execute("DROP TABLE IF EXISTS rows")
+            if self.columns:
+                self.conn.execute(f"ALTER TABLE {self.table} RENAME TO rows")
+            self.table = "rows"
+        self.set_meta("token", _encode_token(token))
+        self.set_meta("refreshed_at", time.time())
+        self.conn.commit()
+
+    def read_rows(self, row_filter: RowFilter = None) -> list[tuple]:
+        if not self.columns:
+            return []
+        # Filter/proyeksi yang sama seperti ke server, dijalankan di SQLite lokal
+        numeric = set(self.numeric_columns)
+
+        def operand(column):
+            return f"CAST({_quote(column)} AS NUMERIC)" if column in numeric else _quote(column)
+
+        query, params = sql_query("rows", row_filter, _quote, placeholder="?", operand=operand)
+        return self.conn.execute(query, params).fetchall()
+
+    def search(self, column: str, keyword: str) -> list[tuple]:
+        if column not in self.columns:
+            return []
+        return self.conn.execute(f"SELECT * FROM rows WHERE {_quote(column)} LIKE ?", (f"%{keyword}%",)).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def snapshot_path(db: str, schema: str, table: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"{db}__{schema}__{table}.sqlite")
+
+
+def _enforce_cache_limit(keep: str):
+    # LRU: file yang paling lama tidak diakses dihapus lebih dulu
+    files = [os.path.join(SNAPSHOT_DIR, name) for name in os.listdir(SNAPSHOT_DIR) if name.endswith(".sqlite")]
+    files.sort(key=lambda path: os.stat(path).st_mtime)
+    total = sum(os.path.getsize(path) for path in files)
+    for path in files:
+        if total <= SNAPSHOT_MAX_BYTES:
+            break
+        if path == keep:
+            continue
+        total -= os.path.getsize(path)
+        os.remove(path)
+
+
+def refresh_snapshot(handler, db: str, schema: str, table: str, watermark: str = None,
+                     full: bool = False, batch_size: int = 1000) -> tuple[int, str]:
+    """Buat atau perbarui snapshot, kembalikan (jumlah baris yang ditulis, mode).
+
+    Refresh inkremental hanya mengambil baris dengan watermark > nilai terakhir, jadi baris
+    yang dihapus di source tetap ada di snapshot sampai refresh penuh (--full). Tabel tanpa
+    PRIMARY KEY selalu di-refresh penuh.
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    path = snapshot_path(db, schema, table)
+    snapshot = Snapshot(path)
+    try:
+        old_token = snapshot.token
+        watermark = watermark or snapshot.get_meta("watermark")
+        token = handler.freshness_token(schema, table, watermark)
+
+        # Tanpa PRIMARY KEY tidak ada unique index, INSERT OR REPLACE akan menggandakan baris
+        key = handler.primary_key(schema, table)
+        if watermark and not key and not full:
+            print(f"⚠️ Tabel '{table}' tidak punya PRIMARY KEY, watermark diabaikan dan snapshot di-refresh penuh.")
+        since = None
+        if not full and key and old_token and watermark and snapshot.columns:
+            if old_token.get("watermark") is not None:
+                since = (watermark, old_token["watermark"])
+        if since is None:
+            snapshot.reset(key)
+        snapshot.set_meta("watermark", watermark)
+
+        count = 0
+        for batch in handler.iter_batches(schema, table, batch_size, since=since):
+            count += snapshot.write_batch(batch)
+        snapshot.commit(token)
+    finally:
+        snapshot.close()
+
+    os.utime(path)
+    _enforce_cache_limit(keep=path)
+    return count, "inkremental" if since else "penuh"
+
+
+def open_fresh_snapshot(handler, db: str, schema: str, table: str) -> Snapshot:
+    """Buka snapshot jika masih sesuai dengan tabel remote, None jika belum pernah dibuat atau gagal diperbarui."""
+    path = snapshot_path(db, schema, table)
+    if not os.path.exists(path):
+        return None
+
+    snapshot = Snapshot(path)
+    try:
+        token = handler.freshness_token(schema, table, snapshot.get_meta("watermark"))
+        age = time.time() - snapshot.get_meta("refreshed_at", 0)
+        fresh = token == snapshot.token and (token or age < SNAPSHOT_TTL)
+        snapshot.close()
+
+        if not fresh:
+            count, mode = refresh_snapshot(handler, db, schema, table)
+            print(f"🔄 Snapshot diperbarui ({mode}, {count} baris).")
+    except Exception as e:
+        # Snapshot lama tidak bisa divalidasi/diperbarui: baca langsung dari server saja
+        snapshot.close()
+        print(f"⚠️ Snapshot tidak bisa diperbarui ({e}), membaca langsung dari database.")
+        return None
+
+    os.utime(path)
+    return Snapshot(path)